@@ -3,7 +3,11 @@ from fastapi.responses import JSONResponse
 
 from telegram.exceptions import InvalidTokenError
 
-from api.exceptions import BotAlreadyEnabledError, BotNotFoundError
+from api.exceptions import (
+    BotAlreadyEnabledError,
+    BotNotFoundError,
+    UpdateQueueFullError,
+)
 
 from collections.abc import Callable, Coroutine
 from typing import Any
@@ -45,10 +49,23 @@ async def invalid_token_exception_handler(
     )
 
 
+async def update_queue_full_exception_handler(
+    request: Request, exception: UpdateQueueFullError
+) -> JSONResponse:
+    return JSONResponse(
+        {
+            'code': 'update_queue_full',
+            'detail': 'The update queue is full, retry later.',
+        },
+        status.HTTP_429_TOO_MANY_REQUESTS,
+    )
+
+
 EXCEPTION_HANDLERS: dict[
     int | type[Exception], Callable[[Request, Any], Coroutine[Any, Any, Response]]
 ] = {
     BotNotFoundError: bot_not_found_exception_handler,
     BotAlreadyEnabledError: bot_already_enabled_exception_handler,
     InvalidTokenError: invalid_token_exception_handler,
+    UpdateQueueFullError: update_queue_full_exception_handler,
 }
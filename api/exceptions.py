@@ -4,3 +4,7 @@ class BotNotFoundError(Exception):
 
 class BotAlreadyEnabledError(Exception):
     pass
+
+
+class UpdateQueueFullError(Exception):
+    pass
@@ -5,11 +5,20 @@ from telegram.models import Update
 import msgspec
 
 from bot import Bot
+from bot.queue import UpdateQueue
+from core.settings import UPDATE_QUEUE_CONCURRENCY, UPDATE_QUEUE_MAX_SIZE
 from core.storage import bots
 
 from .deps import ValidBot, verify_self_token
-from .exceptions import BotAlreadyEnabledError
-from .schemas import BotWebhookTrigger, RestartBotData, StartBotData, StartBotsItemData
+from .exceptions import BotAlreadyEnabledError, UpdateQueueFullError
+from .schemas import (
+    BotWebhookTrigger,
+    InvalidateBotData,
+    RestartBotData,
+    StartBotData,
+    StartBotsItemData,
+    UpdateQueueInfo,
+)
 
 import asyncio
 import logging
@@ -20,6 +29,9 @@ logger = logging.getLogger(__name__)
 router = APIRouter(dependencies=[Depends(verify_self_token)])
 
 bot_start_sem = asyncio.Semaphore(10)
+update_queue = UpdateQueue(
+    max_size=UPDATE_QUEUE_MAX_SIZE, concurrency=UPDATE_QUEUE_CONCURRENCY
+)
 
 update_decoder = msgspec.json.Decoder(Update)
 bot_webhook_trigger_decoder = msgspec.json.Decoder(BotWebhookTrigger)
@@ -30,6 +42,16 @@ async def get_bots() -> list[int]:
     return list(bots)
 
 
+@router.get('/updates/queue/')
+async def get_update_queue() -> UpdateQueueInfo:
+    return UpdateQueueInfo(
+        size=update_queue.size,
+        max_size=update_queue.max_size,
+        in_flight=update_queue.in_flight,
+        lanes=update_queue.lanes,
+    )
+
+
 async def _start_bot(service_id: int, token: str, webhook_url: str) -> None:
     async with bot_start_sem:
         bot = Bot(service_id=service_id, token=token, webhook_url=webhook_url)
@@ -91,17 +113,39 @@ async def stop_bot(
     background_tasks.add_task(bot.stop)
 
 
-@router.post(
-    '/bots/{service_id}/webhooks/telegram/', status_code=status.HTTP_202_ACCEPTED
-)
-async def bot_webhook(
-    service_id: int, bot: ValidBot, request: Request, background_tasks: BackgroundTasks
+@router.post('/bots/{service_id}/invalidate/', status_code=status.HTTP_202_ACCEPTED)
+async def invalidate_bot(
+    service_id: int,
+    bot: ValidBot,
+    data: InvalidateBotData,
+    background_tasks: BackgroundTasks,
 ) -> None:
     background_tasks.add_task(
-        bot.feed_webhook_update, update_decoder.decode(await request.body())
+        bot.invalidate,
+        version=data.version,
+        objects=(
+            [(obj.type, obj.id) for obj in data.objects]
+            if data.objects is not None
+            else None
+        ),
     )
 
 
+@router.post(
+    '/bots/{service_id}/webhooks/telegram/', status_code=status.HTTP_202_ACCEPTED
+)
+async def bot_webhook(service_id: int, bot: ValidBot, request: Request) -> None:
+    update: Update = update_decoder.decode(await request.body())
+
+    if update.update_id in bot.update_ids:
+        return
+
+    if not update_queue.put(bot, update):
+        raise UpdateQueueFullError()
+
+    bot.update_ids.add(update.update_id)
+
+
 @router.post(
     '/bots/{service_id}/webhooks/trigger/', status_code=status.HTTP_202_ACCEPTED
 )
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 import msgspec
 
+from service.enums import ConnectionTargetObjectType, SubjectObjectType
 from service.models import Trigger
 
 
@@ -21,6 +22,23 @@ class RestartBotData(BotStartupData):
     pass
 
 
+class InvalidateBotObjectData(BaseModel):
+    type: ConnectionTargetObjectType | SubjectObjectType
+    id: int
+
+
+class InvalidateBotData(BaseModel):
+    version: int | None = None
+    objects: list[InvalidateBotObjectData] | None = None
+
+
+class UpdateQueueInfo(BaseModel):
+    size: int
+    max_size: int
+    in_flight: int
+    lanes: int
+
+
 class BotWebhookTrigger(msgspec.Struct):
     trigger: Trigger
     trigger_has_target_connections: bool
@@ -1,3 +1,6 @@
+from telegram.enums import SendPriority
+from telegram.scheduler import use_send_priority
+
 from core.settings import (
     BOT_BACKGROUND_MONITOR_TOKEN_INTERVAL,
     BOT_BACKGROUND_PROCESS_SERVICE_TASKS_INTERVAL,
@@ -30,7 +33,8 @@ class BackgroundTaskManager:
         while True:
             await asyncio.sleep(interval)
             try:
-                await func()
+                with use_send_priority(SendPriority.BROADCAST):
+                    await func()
             except Exception:
                 logger.exception('Background task %s failed.', func.__class__.__name__)
 
@@ -100,9 +100,11 @@ class ProcessServiceTasksTask(BackgroundTask):
             else:
                 active_tasks.append(task)
 
+        def update_completed_tasks(storage_data: BotStorageData) -> None:
+            storage_data.completed_background_tasks.update(completed_tasks)
+
         if not active_tasks:
-            async with self.bot.storage.transaction() as storage_data:
-                storage_data.completed_background_tasks.update(completed_tasks)
+            await self.bot.storage.update(update_completed_tasks)
             return
 
         service_bot: ServiceBot = await self.bot.service.get_bot()
@@ -152,5 +154,7 @@ class ProcessServiceTasksTask(BackgroundTask):
         for task in active_tasks:
             completed_tasks[task.id] = current_datetime
 
-        async with self.bot.storage.transaction() as storage_data:
+        def set_completed_tasks(storage_data: BotStorageData) -> None:
             storage_data.completed_background_tasks = completed_tasks
+
+        await self.bot.storage.update(set_completed_tasks)
@@ -1,17 +1,24 @@
 from telegram.client import TelegramClient
-from telegram.enums import ChatType, UpdateType
+from telegram.enums import ChatType, SendPriority, UpdateType
 from telegram.exceptions import TelegramError
 from telegram.models import BotCommand, Chat, Update, User
+from telegram.scheduler import use_send_priority
 
 from multidict import MultiDict
 import msgspec
 
 from core.enums import Mode
 from core.msgspec import json_decoder
-from core.settings import MODE, TELEGRAM_TOKEN
+from core.settings import (
+    BOT_FLOW_SNAPSHOT,
+    MODE,
+    TELEGRAM_TOKEN,
+    UPDATE_ID_WINDOW_SIZE,
+)
 from core.storage import bots
 from service.client import ServiceClient
 from service.enums import ChatType as ServiceChatType
+from service.enums import ConnectionTargetObjectType, SubjectObjectType
 from service.models import Bot as ServiceBot
 from service.models import Chat as ServiceChat
 from service.models import Pagination, Trigger
@@ -21,8 +28,10 @@ from service.schemas import BindUserToChat, CreateChat, CreateUser
 from .background.manager import BackgroundTaskManager
 from .context import HandlerContext
 from .exceptions import NoTriggerSubscribersError
+from .graph import FlowGraph
 from .handler import Handler
-from .storage import Storage
+from .queue import UpdateIdWindow
+from .storage import Storage, TriggerSubscriberStorage
 from .storage.models import TriggerSubscriber
 from .utils.validation import are_subjects_allowed, is_subject_allowed
 
@@ -44,6 +53,8 @@ COMMAND_CLEANUP_PATTERN: Final[re.Pattern[str]] = re.compile(f'[{string.punctuat
 
 class Bot:
     _me: User | None = None
+    graph: FlowGraph | None = None
+    _graph_generation: int = 0
 
     def __init__(self, service_id: int, token: str, webhook_url: str) -> None:
         self.token = token
@@ -53,7 +64,9 @@ class Bot:
         self.service_id = service_id
         self.service = ServiceClient(service_id)
         self.storage = Storage.for_bot(bot_id=self.telegram_id)
+        self.trigger_subscribers = TriggerSubscriberStorage(bot_id=self.telegram_id)
         self.handler = Handler(self)
+        self.update_ids = UpdateIdWindow(size=UPDATE_ID_WINDOW_SIZE)
         self.background_task_manager = BackgroundTaskManager(self)
 
     @property
@@ -186,20 +199,12 @@ class Bot:
                 pagination.count - (offset + limit) <= 0,
             )
 
-        async with self.storage.transaction() as storage_data:
-            raw_subscribers: set[TriggerSubscriber] | None = (
-                storage_data.expected_triggers.pop(trigger.id, None)
-            )
-
-            if not raw_subscribers:
-                raise NoTriggerSubscribersError(trigger.id)
-
-            subscribers: list[TriggerSubscriber] = list(raw_subscribers)
-            subscriber_batch: list[TriggerSubscriber] = subscribers[:limit]
-            subscribers = subscribers[limit:]
+        subscriber_batch: list[TriggerSubscriber] = await self.trigger_subscribers.pop(
+            trigger.id, limit
+        )
 
-            if subscribers:
-                storage_data.expected_triggers[trigger.id] = set(subscribers)
+        if not subscriber_batch:
+            raise NoTriggerSubscribersError(trigger.id)
 
         chat_id_user_id_pair: MultiDict[int | None] = MultiDict(
             [
@@ -257,6 +262,14 @@ class Bot:
 
     async def feed_webhook_trigger(
         self, trigger: Trigger, trigger_has_target_connections: bool, payload: str
+    ) -> None:
+        with use_send_priority(SendPriority.BROADCAST):
+            await self._feed_webhook_trigger(
+                trigger, trigger_has_target_connections, payload
+            )
+
+    async def _feed_webhook_trigger(
+        self, trigger: Trigger, trigger_has_target_connections: bool, payload: str
     ) -> None:
         if not trigger.source_connections:
             return
@@ -326,6 +339,29 @@ class Bot:
 
             offset += limit
 
+    async def load_graph(self) -> None:
+        self._graph_generation += 1
+        generation: int = self._graph_generation
+        graph: FlowGraph = await FlowGraph.load(self.service)
+
+        if generation == self._graph_generation:
+            self.graph = graph
+
+    async def invalidate(
+        self,
+        version: int | None = None,
+        objects: Iterable[tuple[ConnectionTargetObjectType | SubjectObjectType, int]]
+        | None = None,
+    ) -> None:
+        if not (
+            self.service.invalidate_cache(version=version, objects=objects)
+            and BOT_FLOW_SNAPSHOT
+        ):
+            return
+
+        # The current graph keeps serving until the reloaded one replaces it.
+        await self.load_graph()
+
     async def _set_menu_commands(self) -> None:
         triggers: list[Trigger] = await self.service.get_triggers(
             has_command=True, has_command_payload=False, has_command_description=True
@@ -349,6 +385,7 @@ class Bot:
         self._me, *_ = await asyncio.gather(
             self.telegram.get_me(),
             self._set_menu_commands(),
+            self.load_graph() if BOT_FLOW_SNAPSHOT else asyncio.sleep(0),
             self.telegram.set_webhook(
                 self.webhook_url,
                 allowed_updates=[
@@ -359,6 +396,7 @@ class Bot:
                 secret_token=TELEGRAM_TOKEN,
             ),
         )
+        await self.trigger_subscribers.migrate()
         await self.background_task_manager.start()
         await self.service.assign_to_hub()
 
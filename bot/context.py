@@ -2,8 +2,9 @@ from telegram.models import Chat, Update, User
 
 from bot.variables import Variables
 
-from .storage import Storage
-from .storage.models import ChatStorageData, UserStorageData
+from .storage import Storage, UserStorage
+from .storage.models import ChatStorageData
+from .storage.unit_of_work import StorageUnitOfWork
 
 from typing import TYPE_CHECKING, Any
 import copy
@@ -15,18 +16,38 @@ else:
 
 
 class HandlerContext:
-    def __init__(self, bot: Bot, update: Update) -> None:
+    def __init__(
+        self,
+        bot: Bot,
+        update: Update,
+        unit_of_work: StorageUnitOfWork | None = None,
+    ) -> None:
         chat: Chat | None = update.effective_chat
         user: User | None = update.effective_user
 
+        self.unit_of_work = unit_of_work
         self.chat_storage: Storage[ChatStorageData] | None = (
-            Storage.for_chat(bot_id=bot.telegram_id, chat_id=chat.id) if chat else None
+            Storage.for_chat(
+                bot_id=bot.telegram_id, chat_id=chat.id, unit_of_work=unit_of_work
+            )
+            if chat
+            else None
         )
-        self.user_storage: Storage[UserStorageData] | None = (
-            Storage.for_user(bot_id=bot.telegram_id, chat_id=chat.id, user_id=user.id)
+        self.user_storage: UserStorage | None = (
+            Storage.for_user(
+                bot_id=bot.telegram_id,
+                chat_id=chat.id,
+                user_id=user.id,
+                unit_of_work=unit_of_work,
+            )
             if chat and user
             else None
         )
+
+        if unit_of_work:
+            for storage in (self.chat_storage, self.user_storage):
+                if storage and storage.unit_of_work:
+                    unit_of_work.register(storage)
         self.variables = Variables(
             bot=bot,
             chat=chat,
@@ -2,3 +2,9 @@ class NoTriggerSubscribersError(Exception):
     def __init__(self, trigger_id: int) -> None:
         self.trigger_id = trigger_id
         super().__init__(f'No subscribers found for trigger (service_id={trigger_id}).')
+
+
+class APIResponseTooLargeError(Exception):
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        super().__init__(f'API response is larger than {max_size} bytes.')
@@ -0,0 +1,134 @@
+from service.client import ServiceClient
+from service.enums import ConnectionTargetObjectType
+from service.models import (
+    APIRequest,
+    BackgroundTask,
+    Condition,
+    Connection,
+    DatabaseOperation,
+    Invoice,
+    Message,
+    TemporaryVariable,
+    Trigger,
+)
+
+from collections.abc import Iterable, Sequence
+from itertools import chain
+import asyncio
+
+Node = (
+    Trigger
+    | Message
+    | Condition
+    | APIRequest
+    | DatabaseOperation
+    | Invoice
+    | TemporaryVariable
+)
+NodeKey = tuple[ConnectionTargetObjectType, int]
+
+
+class FlowGraph:
+    def __init__(
+        self,
+        *,
+        triggers: list[Trigger],
+        messages: list[Message],
+        conditions: list[Condition],
+        background_tasks: list[BackgroundTask],
+        api_requests: list[APIRequest],
+        database_operations: list[DatabaseOperation],
+        invoices: list[Invoice],
+        temporary_variables: list[TemporaryVariable],
+    ) -> None:
+        self.triggers = triggers
+        self.messages = messages
+        self.conditions = conditions
+        self.background_tasks = background_tasks
+        self.api_requests = api_requests
+        self.database_operations = database_operations
+        self.invoices = invoices
+        self.temporary_variables = temporary_variables
+
+        self.nodes: dict[NodeKey, Node] = {}
+        self.edges: dict[NodeKey, list[NodeKey]] = {}
+
+        node_groups: list[tuple[ConnectionTargetObjectType, Sequence[Node]]] = [
+            (ConnectionTargetObjectType.TRIGGER, triggers),
+            (ConnectionTargetObjectType.MESSAGE, messages),
+            (ConnectionTargetObjectType.CONDITION, conditions),
+            (ConnectionTargetObjectType.API_REQUEST, api_requests),
+            (ConnectionTargetObjectType.DATABASE_OPERATION, database_operations),
+            (ConnectionTargetObjectType.INVOICE, invoices),
+            (ConnectionTargetObjectType.TEMPORARY_VARIABLE, temporary_variables),
+        ]
+
+        for type, objects in node_groups:
+            for obj in objects:
+                key: NodeKey = (type, obj.id)
+                self.nodes[key] = obj
+                self.edges[key] = self._get_target_keys(obj.source_connections)
+
+        self.targeted_nodes: set[NodeKey] = set(
+            chain.from_iterable(self.edges.values())
+        )
+        self.targeted_nodes.update(
+            self._get_target_keys(
+                chain.from_iterable(
+                    chain(
+                        (task.source_connections for task in background_tasks),
+                        (
+                            button.source_connections
+                            for message in messages
+                            if message.keyboard
+                            for button in message.keyboard.buttons
+                        ),
+                    )
+                )
+            )
+        )
+
+    @staticmethod
+    def _get_target_keys(connections: Iterable[Connection]) -> list[NodeKey]:
+        return [
+            (connection.target_object_type, connection.target_object_id)
+            for connection in connections
+        ]
+
+    @classmethod
+    async def load(cls, service: ServiceClient) -> FlowGraph:
+        (
+            triggers,
+            messages,
+            conditions,
+            background_tasks,
+            api_requests,
+            database_operations,
+            invoices,
+            temporary_variables,
+        ) = await asyncio.gather(
+            service.get_triggers(),
+            service.get_messages(),
+            service.get_conditions(),
+            service.get_background_tasks(),
+            service.get_api_requests(),
+            service.get_database_operations(),
+            service.get_invoices(),
+            service.get_temporary_variables(),
+        )
+        return cls(
+            triggers=triggers,
+            messages=messages,
+            conditions=conditions,
+            background_tasks=background_tasks,
+            api_requests=api_requests,
+            database_operations=database_operations,
+            invoices=invoices,
+            temporary_variables=temporary_variables,
+        )
+
+    def get(self, type: ConnectionTargetObjectType, id: int) -> Node | None:
+        return self.nodes.get((type, id))
+
+    def has_target_connections(self, type: ConnectionTargetObjectType, id: int) -> bool:
+        return (type, id) in self.targeted_nodes
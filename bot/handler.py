@@ -1,12 +1,14 @@
 from telegram.models import Message, Update
 
+from service.enums import ConnectionTargetObjectType, MessageKeyboardType
 from service.models import Connection, MessageKeyboardButton, Trigger
 
 from .context import HandlerContext
+from .graph import FlowGraph
 from .handlers.connection import ConnectionHandler
-from .storage import Storage
-from .storage.models import UserStorageData
-from .utils.variables import replace_text_variables
+from .storage import UserStorage
+from .storage.unit_of_work import StorageUnitOfWork
+from .utils.variables import VARIABLE_PATTERN, replace_text_variables
 from .variables import Variables
 
 from collections.abc import Awaitable, Callable, Sequence
@@ -20,7 +22,99 @@ else:
     Bot = Any
 
 
+class TriggerIndex:
+    def __init__(self, graph: FlowGraph) -> None:
+        self.graph = graph
+        self.command_triggers: dict[tuple[str, str | None], list[Trigger]] = {}
+        self.message_text_triggers: dict[str, list[Trigger]] = {}
+        self.message_template_triggers: list[Trigger] = []
+        self.message_any_triggers: list[Trigger] = []
+
+        for trigger in graph.triggers:
+            if not trigger.source_connections:
+                continue
+
+            if trigger_command := trigger.command:
+                self.command_triggers.setdefault(
+                    (trigger_command.command, trigger_command.payload or None), []
+                ).append(trigger)
+
+            if not (trigger_message := trigger.message) or graph.has_target_connections(
+                ConnectionTargetObjectType.TRIGGER, trigger.id
+            ):
+                continue
+
+            if not trigger_message.text:
+                self.message_any_triggers.append(trigger)
+            elif VARIABLE_PATTERN.search(trigger_message.text):
+                self.message_template_triggers.append(trigger)
+            else:
+                self.message_text_triggers.setdefault(trigger_message.text, []).append(
+                    trigger
+                )
+
+    def get_command_triggers(self, command: str, payload: str | None) -> list[Trigger]:
+        return self.command_triggers.get((command, payload), [])
+
+    async def get_message_triggers(
+        self, message_text: str, variables: Variables
+    ) -> list[Trigger]:
+        triggers: list[Trigger] = self.message_text_triggers.get(
+            message_text, []
+        ).copy()
+
+        if self.message_template_triggers:
+            trigger_message_texts: list[str] = await asyncio.gather(
+                *[
+                    replace_text_variables(
+                        trigger.message.text,  # type: ignore [union-attr, arg-type]
+                        variables,
+                    )
+                    for trigger in self.message_template_triggers
+                ]
+            )
+            triggers.extend(
+                trigger
+                for trigger, trigger_message_text in zip(
+                    self.message_template_triggers, trigger_message_texts, strict=True
+                )
+                if message_text == trigger_message_text
+            )
+
+        return triggers + self.message_any_triggers
+
+
+class KeyboardButtonIndex:
+    def __init__(self, graph: FlowGraph) -> None:
+        self.graph = graph
+        self.button_connections: dict[int, list[Connection]] = {}
+        self.button_text_connections: dict[str, list[Connection]] = {}
+
+        for message in graph.messages:
+            if not message.keyboard:
+                continue
+
+            # Only inline buttons send callback queries and only reply keyboard
+            # buttons send their text.
+            for button in message.keyboard.buttons:
+                if message.keyboard.type == MessageKeyboardType.INLINE:
+                    self.button_connections[button.id] = button.source_connections
+                elif message.keyboard.type == MessageKeyboardType.DEFAULT:
+                    self.button_text_connections.setdefault(button.text, []).extend(
+                        button.source_connections
+                    )
+
+    def get_connections(self, id: int) -> list[Connection]:
+        return self.button_connections.get(id, [])
+
+    def get_text_connections(self, text: str) -> list[Connection]:
+        return self.button_text_connections.get(text, [])
+
+
 class Handler:
+    _trigger_index: TriggerIndex | None = None
+    _keyboard_button_index: KeyboardButtonIndex | None = None
+
     def __init__(self, bot: Bot) -> None:
         self.bot = bot
         self.connection_handler = ConnectionHandler(self.bot)
@@ -36,7 +130,7 @@ class Handler:
         self, update: Update, context: HandlerContext
     ) -> list[Connection] | None:
         message: Message | None = update.message
-        user_storage: Storage[UserStorageData] | None = context.user_storage
+        user_storage: UserStorage | None = context.user_storage
 
         if not (
             message
@@ -47,8 +141,7 @@ class Handler:
         ):
             return None
 
-        storage_data: UserStorageData = await user_storage.get_data()
-        expected_trigger_id: int | None = storage_data.expected_trigger_id
+        expected_trigger_id: int | None = await user_storage.get_expected_trigger_id()
 
         if not expected_trigger_id:
             return None
@@ -83,11 +176,35 @@ class Handler:
         else:
             return None
 
-        async with user_storage.transaction() as storage_data:
-            storage_data.expected_trigger_id = None
+        await user_storage.set_expected_trigger_id(None)
 
         return connections
 
+    def _get_trigger_index(self) -> TriggerIndex | None:
+        graph: FlowGraph | None = self.bot.graph
+
+        if not graph:
+            return None
+
+        if not self._trigger_index or self._trigger_index.graph is not graph:
+            self._trigger_index = TriggerIndex(graph)
+
+        return self._trigger_index
+
+    def _get_keyboard_button_index(self) -> KeyboardButtonIndex | None:
+        graph: FlowGraph | None = self.bot.graph
+
+        if not graph:
+            return None
+
+        if (
+            not self._keyboard_button_index
+            or self._keyboard_button_index.graph is not graph
+        ):
+            self._keyboard_button_index = KeyboardButtonIndex(graph)
+
+        return self._keyboard_button_index
+
     async def _get_command_triggers(self, message_text: str) -> list[Trigger] | None:
         if (
             not message_text.startswith('/')
@@ -98,6 +215,9 @@ class Handler:
 
         command, _, payload = message_text.removeprefix('/').partition(' ')
 
+        if trigger_index := self._get_trigger_index():
+            return trigger_index.get_command_triggers(command, payload or None)
+
         return await self.bot.service.get_triggers(
             command=command,
             command_payload=payload or None,
@@ -108,6 +228,9 @@ class Handler:
     async def _get_message_triggers(
         self, message_text: str, variables: Variables
     ) -> list[Trigger] | None:
+        if trigger_index := self._get_trigger_index():
+            return await trigger_index.get_message_triggers(message_text, variables)
+
         (
             triggers_with_message_text,
             triggers_without_message_text,
@@ -178,6 +301,9 @@ class Handler:
     async def _get_message_keyboard_button_connections(
         self, update: Update, context: HandlerContext
     ) -> list[Connection] | None:
+        keyboard_button_index: KeyboardButtonIndex | None = (
+            self._get_keyboard_button_index()
+        )
         buttons: list[MessageKeyboardButton] = []
 
         if (
@@ -185,6 +311,9 @@ class Handler:
             and callback_query.data
             and callback_query.data.isdigit()
         ):
+            if keyboard_button_index:
+                return keyboard_button_index.get_connections(int(callback_query.data))
+
             buttons = await self.bot.service.get_messages_keyboard_buttons(
                 id=int(callback_query.data)
             )
@@ -193,6 +322,9 @@ class Handler:
             and (message_text := message.text)
             and len(message_text) <= 512
         ):
+            if keyboard_button_index:
+                return keyboard_button_index.get_text_connections(message_text)
+
             buttons = await self.bot.service.get_messages_keyboard_buttons(
                 text=message_text
             )
@@ -210,22 +342,26 @@ class Handler:
             )
             return
 
-        context = HandlerContext(self.bot, update)
-
-        await self.connection_handler.handle_many(
-            update,
-            list(
-                chain.from_iterable(
-                    filter(
-                        None,
-                        await asyncio.gather(
-                            *[
-                                fetcher(update, context)
-                                for fetcher in self.connection_fetchers
-                            ]
-                        ),
+        unit_of_work = StorageUnitOfWork()
+        context = HandlerContext(self.bot, update, unit_of_work=unit_of_work)
+
+        try:
+            await self.connection_handler.handle_many(
+                update,
+                list(
+                    chain.from_iterable(
+                        filter(
+                            None,
+                            await asyncio.gather(
+                                *[
+                                    fetcher(update, context)
+                                    for fetcher in self.connection_fetchers
+                                ]
+                            ),
+                        )
                     )
-                )
-            ),
-            context,
-        )
+                ),
+                context,
+            )
+        finally:
+            await unit_of_work.commit()
@@ -0,0 +1,48 @@
+from aiohttp import hdrs
+from multidict import CIMultiDictProxy
+import msgspec
+
+from typing import Any
+
+# The version of the extracted response paths is a part of the key, because bodies
+# are cached with only the paths referenced at that time.
+type ResponseCacheKey = tuple[str, bytes, bytes, int]
+
+
+class CachedResponse(msgspec.Struct):
+    body: Any
+    fresh_until: float
+    etag: str | None = None
+    last_modified: str | None = None
+    must_revalidate: bool = False
+
+
+def get_cache_lifetimes(
+    headers: CIMultiDictProxy[str], default_ttl: int, default_stale_ttl: int
+) -> tuple[int, int] | None:
+    ttl: int = default_ttl
+    shared_ttl: int | None = None
+    stale_ttl: int = default_stale_ttl
+    is_no_cache: bool = False
+
+    for directive in headers.get(hdrs.CACHE_CONTROL, '').lower().split(','):
+        name, _, value = directive.strip().partition('=')
+
+        # Responses are shared between all users of a bot.
+        if name in ('no-store', 'private'):
+            return None
+        elif name == 'no-cache':
+            is_no_cache = True
+        elif not value.strip('"').isdigit():
+            continue
+        elif name == 'max-age':
+            ttl = int(value.strip('"'))
+        elif name == 's-maxage':
+            shared_ttl = int(value.strip('"'))
+        elif name == 'stale-while-revalidate':
+            stale_ttl = int(value.strip('"'))
+
+    if is_no_cache:
+        return 0, stale_ttl
+
+    return (shared_ttl if shared_ttl is not None else ttl), stale_ttl
@@ -0,0 +1,239 @@
+import msgspec
+
+from core.msgspec import json_decoder
+
+from collections.abc import Generator
+from typing import Any, Final
+import re
+
+WHITESPACE_PATTERN: Final[re.Pattern[bytes]] = re.compile(rb'[ \t\n\r]*')
+# The closing quote is only matched in the group, so a string cut by the end of the
+# buffer is told apart from a complete one.
+STRING_PATTERN: Final[re.Pattern[bytes]] = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*(")?')
+CONTAINER_TOKEN_PATTERN: Final[re.Pattern[bytes]] = re.compile(
+    STRING_PATTERN.pattern + rb'|[{}\[\]]'
+)
+SCALAR_END_PATTERN: Final[re.Pattern[bytes]] = re.compile(rb'[,\]}\s]')
+
+QUOTE: Final[int] = ord('"')
+COLON: Final[int] = ord(':')
+COMMA: Final[int] = ord(',')
+OPEN_BRACE: Final[int] = ord('{')
+CLOSE_BRACE: Final[int] = ord('}')
+OPEN_BRACKET: Final[int] = ord('[')
+CLOSE_BRACKET: Final[int] = ord(']')
+
+# Parsers yield, when they need more data, and return the parsed value.
+type Parser[T] = Generator[None, None, T]
+
+
+class ResponseBodyExtractor:
+    def __init__(self, tree: dict[str, Any]) -> None:
+        self.is_done: bool = False
+        self.result: Any = None
+        self._buffer = bytearray()
+        # Parsers keep offsets relative to the position, because the consumed part
+        # of the buffer is dropped while they wait for more data.
+        self._position: int = 0
+        self._captures: int = 0
+        self._is_finished: bool = False
+        self._parser: Parser[Any] = self._parse_value(tree)
+
+    def feed(self, chunk: bytes) -> bool:
+        self._buffer += chunk
+        self._resume()
+        return self.is_done
+
+    def finish(self) -> Any:
+        self._is_finished = True
+        self._resume()
+        return self.result
+
+    def _resume(self) -> None:
+        if self.is_done:
+            return
+
+        try:
+            next(self._parser)
+        except StopIteration as stop:
+            self.is_done = True
+            self.result = stop.value
+
+    def _wait(self) -> Parser[None]:
+        if self._is_finished:
+            raise msgspec.DecodeError('Input data was truncated')
+
+        # Captured values are decoded from the buffer at once, so it's kept whole.
+        if not self._captures:
+            del self._buffer[: self._position]
+            self._position = 0
+
+        yield
+
+    def _peek(self) -> Parser[int]:
+        while True:
+            match: re.Match[bytes] | None = WHITESPACE_PATTERN.match(
+                self._buffer, self._position
+            )
+
+            if match:
+                self._position = match.end()
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+
+            yield from self._wait()
+
+    def _expect(self, char: int) -> Parser[None]:
+        if (yield from self._peek()) != char:
+            raise msgspec.DecodeError(f'Expected {chr(char)!r}')
+
+        self._position += 1
+
+    def _skip_string(self) -> Parser[int]:
+        while True:
+            match: re.Match[bytes] | None = STRING_PATTERN.match(
+                self._buffer, self._position
+            )
+
+            if match and match.group(1):
+                start: int = self._position
+                self._position = match.end()
+                return start
+
+            yield from self._wait()
+
+    def _skip_scalar(self) -> Parser[None]:
+        while True:
+            match: re.Match[bytes] | None = SCALAR_END_PATTERN.search(
+                self._buffer, self._position
+            )
+
+            if match:
+                self._position = match.start()
+                return
+            elif self._is_finished:
+                self._position = len(self._buffer)
+                return
+
+            yield from self._wait()
+
+    def _skip_value(self) -> Parser[None]:
+        char: int = yield from self._peek()
+
+        if char == QUOTE:
+            yield from self._skip_string()
+            return
+        elif char not in (OPEN_BRACE, OPEN_BRACKET):
+            yield from self._skip_scalar()
+            return
+
+        depth: int = 0
+
+        while True:
+            for match in CONTAINER_TOKEN_PATTERN.finditer(self._buffer, self._position):
+                token: int = self._buffer[match.start()]
+
+                if token == QUOTE:
+                    if match.group(1):
+                        continue
+
+                    self._position = match.start()
+                    break
+
+                depth += 1 if token in (OPEN_BRACE, OPEN_BRACKET) else -1
+
+                if not depth:
+                    self._position = match.end()
+                    return
+            else:
+                self._position = len(self._buffer)
+
+            yield from self._wait()
+
+    def _capture(self) -> Parser[Any]:
+        yield from self._peek()
+        start: int = self._position
+        self._captures += 1
+
+        try:
+            yield from self._skip_value()
+        finally:
+            self._captures -= 1
+
+        return json_decoder.decode(self._buffer[start : self._position])
+
+    def _parse_value(self, tree: dict[str, Any] | None) -> Parser[Any]:
+        char: int = yield from self._peek()
+
+        if tree is None:
+            return (yield from self._capture())
+        elif char == OPEN_BRACE:
+            return (yield from self._parse_object(tree))
+        elif char == OPEN_BRACKET:
+            return (yield from self._parse_array(tree))
+
+        return (yield from self._capture())
+
+    def _parse_object(self, tree: dict[str, Any]) -> Parser[dict[str, Any]]:
+        self._position += 1
+        result: dict[str, Any] = {}
+
+        if (yield from self._peek()) == CLOSE_BRACE:
+            self._position += 1
+            return result
+
+        while True:
+            if (yield from self._peek()) != QUOTE:
+                raise msgspec.DecodeError('Expected an object key')
+
+            start: int = yield from self._skip_string()
+            key: str = json_decoder.decode(self._buffer[start : self._position])
+            yield from self._expect(COLON)
+
+            if key in tree:
+                result[key] = yield from self._parse_value(tree[key])
+            else:
+                yield from self._skip_value()
+
+            char: int = yield from self._peek()
+            self._position += 1
+
+            if char == CLOSE_BRACE:
+                return result
+            elif char != COMMA:
+                raise msgspec.DecodeError("Expected ',' or '}'")
+
+    def _parse_array(self, tree: dict[str, Any]) -> Parser[list[Any]]:
+        self._position += 1
+        index_trees: dict[int, dict[str, Any] | None] = {
+            int(part): subtree for part, subtree in tree.items() if part.isdigit()
+        }
+        last_index: int = max(index_trees, default=-1)
+        result: list[Any] = []
+
+        if (yield from self._peek()) == CLOSE_BRACKET:
+            self._position += 1
+            return result
+
+        index: int = 0
+
+        while True:
+            if index in index_trees:
+                result.append((yield from self._parse_value(index_trees[index])))
+            else:
+                yield from self._skip_value()
+
+                # Unused items are replaced with None to keep the indexes of the used
+                # ones.
+                if index < last_index:
+                    result.append(None)
+
+            char: int = yield from self._peek()
+            self._position += 1
+
+            if char == CLOSE_BRACKET:
+                return result
+            elif char != COMMA:
+                raise msgspec.DecodeError("Expected ',' or ']'")
+
+            index += 1
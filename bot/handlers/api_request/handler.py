@@ -2,54 +2,268 @@ from telegram.models import Update
 
 from aiohttp import (
     ClientError,
+    ClientResponse,
     ClientSession,
     ClientTimeout,
     DummyCookieJar,
     TCPConnector,
+    hdrs,
 )
+from multidict import CIMultiDict
+import msgspec
 
+from core.cache import TTLCache
+from core.msgspec import json_encoder
+from core.settings import (
+    API_REQUEST_CACHE_MAX_SIZE,
+    API_REQUEST_CACHE_STALE_TTL,
+    API_REQUEST_KEEPALIVE_TIMEOUT,
+    API_REQUEST_POOL_SIZE,
+    API_REQUEST_POOL_SIZE_PER_HOST,
+    API_REQUEST_RESPONSE_EXTRACTION,
+    API_REQUEST_RESPONSE_EXTRACTION_MAX_SIZE,
+    API_REQUEST_RESPONSE_MAX_SIZE,
+)
+from service.enums import APIRequestMethod
 from service.models import APIRequest, Connection
 
 from ...context import HandlerContext
+from ...exceptions import APIResponseTooLargeError
+from ...graph import FlowGraph
 from ...utils.variables import replace_data_variables
 from ..base import BaseHandler
+from .cache import CachedResponse, ResponseCacheKey, get_cache_lifetimes
 from .resolver import SafeResolver
-from .utils import get_safe_headers, parse_response_body
+from .utils import (
+    extract_response_body,
+    get_response_path_tree,
+    get_safe_headers,
+    parse_response_body,
+    read_response_body,
+)
+
+from typing import TYPE_CHECKING, Any
+import asyncio
+import logging
+import time
+
+if TYPE_CHECKING:
+    from ...bot import Bot
+else:
+    Bot = Any
+
+logger = logging.getLogger(__name__)
 
 
 class APIRequestHandler(BaseHandler[APIRequest]):
+    _session: ClientSession | None = None
+
+    def __init__(self, bot: Bot) -> None:
+        super().__init__(bot)
+        self._response_cache: TTLCache[ResponseCacheKey, CachedResponse] = TTLCache(
+            ttl=0, maxsize=API_REQUEST_CACHE_MAX_SIZE
+        )
+        self._revalidations: dict[ResponseCacheKey, asyncio.Task[Any]] = {}
+        self._response_path_graph: FlowGraph | None = None
+        self._response_path_tree: dict[str, Any] | None = None
+        self._response_path_version: int = 0
+
+    @classmethod
+    def get_session(cls) -> ClientSession:
+        if not cls._session:
+            cls._session = ClientSession(
+                connector=TCPConnector(
+                    resolver=SafeResolver(),
+                    limit=API_REQUEST_POOL_SIZE,
+                    limit_per_host=API_REQUEST_POOL_SIZE_PER_HOST,
+                    keepalive_timeout=API_REQUEST_KEEPALIVE_TIMEOUT,
+                ),
+                skip_auto_headers=['User-Agent'],
+                cookie_jar=DummyCookieJar(),
+                timeout=ClientTimeout(6),
+            )
+        return cls._session
+
+    @property
+    def session(self) -> ClientSession:
+        return self.get_session()
+
+    def _update_response_path_tree(self) -> None:
+        graph: FlowGraph | None = (
+            self.bot.graph if API_REQUEST_RESPONSE_EXTRACTION else None
+        )
+
+        if graph is self._response_path_graph:
+            return
+
+        self._response_path_graph = graph
+        self._response_path_tree = get_response_path_tree(graph) if graph else None
+        self._response_path_version += 1
+
+    def _cache_response(
+        self,
+        key: ResponseCacheKey,
+        default_ttl: int,
+        response: ClientResponse,
+        body: Any,
+        cached_response: CachedResponse | None = None,
+    ) -> None:
+        lifetimes: tuple[int, int] | None = get_cache_lifetimes(
+            response.headers, default_ttl, API_REQUEST_CACHE_STALE_TTL
+        )
+
+        if not lifetimes:
+            self._response_cache.pop(key)
+            return
+
+        ttl, stale_ttl = lifetimes
+        etag: str | None = response.headers.get(hdrs.ETAG)
+        last_modified: str | None = response.headers.get(hdrs.LAST_MODIFIED)
+
+        # A 304 doesn't have to repeat the validators of the revalidated response.
+        if cached_response:
+            etag = etag or cached_response.etag
+            last_modified = last_modified or cached_response.last_modified
+
+        # Responses without a lifetime are only kept for conditional requests.
+        if not (ttl or etag or last_modified):
+            self._response_cache.pop(key)
+            return
+
+        self._response_cache.set(
+            key,
+            CachedResponse(
+                body=body,
+                fresh_until=time.monotonic() + ttl,
+                etag=etag,
+                last_modified=last_modified,
+                must_revalidate=not ttl,
+            ),
+            ttl=ttl + stale_ttl,
+        )
+
+    async def _request(
+        self,
+        api_request: APIRequest,
+        headers: CIMultiDict[str],
+        data: Any,
+        cache_key: ResponseCacheKey | None = None,
+        cached_response: CachedResponse | None = None,
+    ) -> Any:
+        tree: dict[str, Any] | None = self._response_path_tree
+
+        if cached_response:
+            headers = headers.copy()
+
+            if cached_response.etag:
+                headers[hdrs.IF_NONE_MATCH] = cached_response.etag
+            if cached_response.last_modified:
+                headers[hdrs.IF_MODIFIED_SINCE] = cached_response.last_modified
+
+        async with self.session.request(
+            api_request.method.value,
+            api_request.url,
+            headers=headers,
+            json=data,
+            allow_redirects=False,
+        ) as response:
+            if cached_response and response.status == 304:
+                body: Any = cached_response.body
+            elif tree is not None and response.content_type.endswith('json'):
+                body = await extract_response_body(
+                    response, tree, API_REQUEST_RESPONSE_EXTRACTION_MAX_SIZE
+                )
+            else:
+                body = parse_response_body(
+                    await read_response_body(response, API_REQUEST_RESPONSE_MAX_SIZE)
+                )
+
+            if cache_key and response.status in (200, 304):
+                self._cache_response(
+                    cache_key,
+                    api_request.cache_ttl or 0,
+                    response,
+                    body,
+                    cached_response if response.status == 304 else None,
+                )
+
+        return body
+
+    async def _revalidate(
+        self,
+        cache_key: ResponseCacheKey,
+        api_request: APIRequest,
+        headers: CIMultiDict[str],
+        data: Any,
+        cached_response: CachedResponse,
+    ) -> None:
+        try:
+            await self._request(api_request, headers, data, cache_key, cached_response)
+        except ClientError, TimeoutError, APIResponseTooLargeError, msgspec.DecodeError:
+            logger.debug(
+                'Failed revalidation of API request (service_id=%s) response.',
+                api_request.id,
+            )
+        finally:
+            del self._revalidations[cache_key]
+
     async def handle(
         self, update: Update, api_request: APIRequest, context: HandlerContext
     ) -> list[Connection] | None:
-        try:
-            async with (
-                ClientSession(
-                    connector=TCPConnector(resolver=SafeResolver()),
-                    headers={
-                        'User-Agent': (
-                            'ConstructorTelegramBots '
-                            f'(constructor.exg1o.org; bot_id={self.bot.telegram_id})'
+        self._update_response_path_tree()
+
+        headers: CIMultiDict[str] = get_safe_headers(api_request.headers)
+        headers[hdrs.USER_AGENT] = (
+            'ConstructorTelegramBots '
+            f'(constructor.exg1o.org; bot_id={self.bot.telegram_id})'
+        )
+        data: Any = await replace_data_variables(
+            api_request.body, context.variables, deserialize=True
+        )
+        cache_key: ResponseCacheKey | None = None
+        cached_response: CachedResponse | None = None
+
+        if api_request.cache_ttl and api_request.method == APIRequestMethod.GET:
+            cache_key = (
+                api_request.url,
+                json_encoder.encode(sorted(headers.items())),
+                json_encoder.encode(data),
+                self._response_path_version,
+            )
+            cached_response = self._response_cache.get(cache_key)
+
+            # Responses that must be revalidated are requested conditionally below.
+            if cached_response and not cached_response.must_revalidate:
+                # Stale responses are served while they are revalidated in background.
+                if (
+                    cached_response.fresh_until <= time.monotonic()
+                    and cache_key not in self._revalidations
+                ):
+                    self._revalidations[cache_key] = asyncio.create_task(
+                        self._revalidate(
+                            cache_key, api_request, headers, data, cached_response
                         )
-                    },
-                    skip_auto_headers=['User-Agent'],
-                    cookie_jar=DummyCookieJar(),
-                    timeout=ClientTimeout(6),
-                ) as session,
-                session.request(
-                    api_request.method.value,
-                    api_request.url,
-                    headers=get_safe_headers(api_request.headers),
-                    json=await replace_data_variables(
-                        api_request.body, context.variables, deserialize=True
-                    ),
-                    allow_redirects=False,
-                ) as response,
-            ):
-                context.variables.add(
-                    'API_RESPONSE',
-                    parse_response_body(await response.content.read(2048)),
-                )
+                    )
+
+                context.variables.add('API_RESPONSE', cached_response.body)
+                return api_request.source_connections
+
+        try:
+            context.variables.add(
+                'API_RESPONSE',
+                await self._request(
+                    api_request, headers, data, cache_key, cached_response
+                ),
+            )
         except ClientError:
             return None
+        except APIResponseTooLargeError, msgspec.DecodeError:
+            logger.warning(
+                'Failed reading of API request (service_id=%s) response.',
+                api_request.id,
+                exc_info=True,
+            )
+            # A response of a previous API request mustn't be mistaken for this one.
+            context.variables.store.pop('API_RESPONSE', None)
 
         return api_request.source_connections
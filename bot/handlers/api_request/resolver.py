@@ -1,17 +1,35 @@
 from aiohttp import ThreadedResolver
 from aiohttp.abc import ResolveResult
 
-from ipaddress import (
-    IPv4Address,
-    IPv4Network,
-    IPv6Address,
-    IPv6Network,
-    ip_address,
-    ip_network,
-)
+from core.cache import TTLCache
+from core.settings import API_REQUEST_DNS_CACHE_MAX_SIZE, API_REQUEST_DNS_CACHE_TTL
+
+from bisect import bisect_right
+from collections.abc import Iterable
+from ipaddress import IPv4Network, IPv6Network, ip_address, ip_network
 import socket
 
 
+def get_network_ranges(
+    networks: Iterable[IPv4Network | IPv6Network],
+) -> dict[int, tuple[list[int], list[int]]]:
+    ranges: dict[int, tuple[list[int], list[int]]] = {}
+
+    for network in sorted(
+        networks, key=lambda network: (network.version, network.network_address)
+    ):
+        starts, ends = ranges.setdefault(network.version, ([], []))
+        start, end = int(network.network_address), int(network.broadcast_address)
+
+        if ends and start <= ends[-1] + 1:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+
+    return ranges
+
+
 class SafeResolver(ThreadedResolver):
     private_networks: list[IPv4Network | IPv6Network] = [
         ip_network('127.0.0.0/8'),
@@ -23,6 +41,29 @@ class SafeResolver(ThreadedResolver):
         ip_network('fc00::/7'),
         ip_network('fe80::/10'),
     ]
+    private_network_ranges: dict[int, tuple[list[int], list[int]]] = get_network_ranges(
+        private_networks
+    )
+
+    _cache: TTLCache[tuple[str, int, socket.AddressFamily], list[ResolveResult]] = (
+        TTLCache(ttl=API_REQUEST_DNS_CACHE_TTL, maxsize=API_REQUEST_DNS_CACHE_MAX_SIZE)
+    )
+
+    @classmethod
+    def is_private_host(cls, host: str) -> bool:
+        address = ip_address(host)
+        ranges: tuple[list[int], list[int]] | None = cls.private_network_ranges.get(
+            address.version
+        )
+
+        if not ranges:
+            return False
+
+        starts, ends = ranges
+        address_int: int = int(address)
+        index: int = bisect_right(starts, address_int) - 1
+
+        return index >= 0 and address_int <= ends[index]
 
     async def resolve(
         self,
@@ -30,16 +71,14 @@ class SafeResolver(ThreadedResolver):
         port: int = 0,
         family: socket.AddressFamily = socket.AF_INET,
     ) -> list[ResolveResult]:
-        hosts: list[ResolveResult] = await super().resolve(hostname, port, family)
-        safe_hosts: list[ResolveResult] = []
+        key: tuple[str, int, socket.AddressFamily] = (hostname, port, family)
+        safe_hosts: list[ResolveResult] | None = self._cache.get(key)
 
-        for host in hosts:
-            host_ip: IPv4Address | IPv6Address = ip_address(host['host'])
+        if safe_hosts is not None:
+            return list(safe_hosts)
 
-            for private_network in self.private_networks:
-                if host_ip in private_network:
-                    break
-            else:
-                safe_hosts.append(host)
+        hosts: list[ResolveResult] = await super().resolve(hostname, port, family)
+        safe_hosts = [host for host in hosts if not self.is_private_host(host['host'])]
+        self._cache.set(key, safe_hosts)
 
-        return safe_hosts
+        return list(safe_hosts)
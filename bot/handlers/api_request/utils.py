@@ -1,9 +1,16 @@
-from aiohttp import hdrs
+from aiohttp import ClientResponse, hdrs
 from multidict import CIMultiDict, istr
 import msgspec
 
-from core.msgspec import json_decoder
+from core.msgspec import json_decoder, json_encoder
 
+from ...exceptions import APIResponseTooLargeError
+from ...graph import FlowGraph
+from ...utils.variables import VARIABLE_PATTERN
+from ...variables import VARIABLE_SEARCH_PATTERN
+from .extractor import ResponseBodyExtractor
+
+from itertools import chain
 from typing import Any, Final
 
 FORBIDDEN_HEADERS: Final[list[istr]] = [
@@ -18,6 +25,7 @@ FORBIDDEN_HEADERS: Final[list[istr]] = [
     hdrs.UPGRADE,
     hdrs.USER_AGENT,
 ]
+RESPONSE_CHUNK_SIZE: Final[int] = 64 * 1024
 
 
 def get_safe_headers(base_headers: dict[str, str] | None = None) -> CIMultiDict[str]:
@@ -34,4 +42,74 @@ def parse_response_body(body: bytes) -> Any:
     try:
         return json_decoder.decode(body)
     except msgspec.DecodeError:
-        return body.decode()
+        return body.decode(errors='replace')
+
+
+async def read_response_body(response: ClientResponse, max_size: int) -> bytes:
+    chunks: list[bytes] = []
+    size: int = 0
+
+    async for chunk in response.content.iter_chunked(RESPONSE_CHUNK_SIZE):
+        size += len(chunk)
+
+        if size > max_size:
+            raise APIResponseTooLargeError(max_size)
+
+        chunks.append(chunk)
+
+    return b''.join(chunks)
+
+
+async def extract_response_body(
+    response: ClientResponse, tree: dict[str, Any], max_size: int
+) -> Any:
+    extractor = ResponseBodyExtractor(tree)
+    size: int = 0
+
+    async for chunk in response.content.iter_chunked(RESPONSE_CHUNK_SIZE):
+        # The rest of the response isn't read, once all paths are extracted.
+        if extractor.feed(chunk[: max_size - size]):
+            return extractor.result
+
+        size += len(chunk)
+
+        if size > max_size:
+            raise APIResponseTooLargeError(max_size)
+
+    return extractor.finish()
+
+
+def get_response_path_tree(graph: FlowGraph) -> dict[str, Any] | None:
+    paths: set[tuple[str, ...]] = set()
+
+    for node in graph.nodes.values():
+        for match in VARIABLE_PATTERN.finditer(json_encoder.encode(node).decode()):
+            key: str = match.group(1).strip()
+
+            for variable_key in chain([key], VARIABLE_SEARCH_PATTERN.findall(key)):
+                prefix, _, path = variable_key.partition('.')
+
+                if prefix != 'API_RESPONSE':
+                    continue
+                elif not path:
+                    return None
+
+                paths.add(tuple(path.split('.')))
+
+    tree: dict[str, Any] = {}
+
+    # Shorter paths go first, so a path under an already kept value is skipped.
+    for path in sorted(paths, key=len):
+        node_tree: dict[str, Any] = tree
+
+        for part in path[:-1]:
+            subtree: dict[str, Any] | None = node_tree.setdefault(part, {})
+
+            if subtree is None:
+                break
+
+            node_tree = subtree
+        else:
+            node_tree[path[-1]] = None
+
+    return tree
@@ -1,58 +1,92 @@
 from telegram.models import Update
 
 from service.enums import ConditionPartNextPartOperator, ConditionPartOperator
-from service.models import Condition, Connection
+from service.models import Condition, ConditionPart, Connection
 
 from ..context import HandlerContext
-from ..utils.variables import replace_text_variables
+from ..utils.deserializers import deserialize_text
+from ..utils.variables import (
+    TEMPLATE_CACHE_MAX_SIZE,
+    VARIABLE_PATTERN,
+    replace_text_variables,
+)
+from ..variables import Variables
 from .base import BaseHandler
 
+from functools import lru_cache
 import asyncio
 
 
+@lru_cache(maxsize=TEMPLATE_CACHE_MAX_SIZE)
+def compile_operand(text: str) -> tuple[bool, str | int | float | bool]:
+    if VARIABLE_PATTERN.search(text):
+        return False, text
+
+    return True, deserialize_text(text)
+
+
+async def _resolve_operand(text: str, variables: Variables) -> str | int | float | bool:
+    is_constant, value = compile_operand(text)
+
+    if is_constant:
+        return value
+
+    return await replace_text_variables(text, variables, deserialize=True)
+
+
+def _compare(
+    operator: ConditionPartOperator,
+    first_value: str | int | float | bool,
+    second_value: str | int | float | bool,
+) -> bool:
+    if operator == ConditionPartOperator.EQUAL:
+        if isinstance(first_value, bool) and isinstance(second_value, bool):
+            return first_value is second_value
+        return first_value == second_value
+    elif operator == ConditionPartOperator.NOT_EQUAL:
+        if isinstance(first_value, bool) and isinstance(second_value, bool):
+            return first_value is not second_value
+        return first_value != second_value
+    elif not isinstance(first_value, str) and not isinstance(second_value, str):
+        if operator == ConditionPartOperator.GREATER:
+            return first_value > second_value
+        elif operator == ConditionPartOperator.GREATER_OR_EQUAL:
+            return first_value >= second_value
+        elif operator == ConditionPartOperator.LESS:
+            return first_value < second_value
+        elif operator == ConditionPartOperator.LESS_OR_EQUAL:
+            return first_value <= second_value
+
+    return False
+
+
 class ConditionHandler(BaseHandler[Condition]):
+    async def _evaluate_part(self, part: ConditionPart, variables: Variables) -> bool:
+        first_value, second_value = await asyncio.gather(
+            _resolve_operand(part.first_value, variables),
+            _resolve_operand(part.second_value, variables),
+        )
+        return _compare(part.operator, first_value, second_value)
+
     async def handle(
         self, update: Update, condition: Condition, context: HandlerContext
     ) -> list[Connection] | None:
         result: bool | None = None
 
         for part in condition.parts:
-            current_result: bool = False
-
-            first_value, second_value = await asyncio.gather(
-                replace_text_variables(
-                    part.first_value, context.variables, deserialize=True
-                ),
-                replace_text_variables(
-                    part.second_value, context.variables, deserialize=True
-                ),
-            )
-
-            if part.operator == ConditionPartOperator.EQUAL:
-                if isinstance(first_value, bool) and isinstance(second_value, bool):
-                    current_result = first_value is second_value
-                else:
-                    current_result = first_value == second_value
-            elif part.operator == ConditionPartOperator.NOT_EQUAL:
-                if isinstance(first_value, bool) and isinstance(second_value, bool):
-                    current_result = first_value is not second_value
-                else:
-                    current_result = first_value != second_value
-            elif not isinstance(first_value, str) and not isinstance(second_value, str):
-                if part.operator == ConditionPartOperator.GREATER:
-                    current_result = first_value > second_value
-                elif part.operator == ConditionPartOperator.GREATER_OR_EQUAL:
-                    current_result = first_value >= second_value
-                elif part.operator == ConditionPartOperator.LESS:
-                    current_result = first_value < second_value
-                elif part.operator == ConditionPartOperator.LESS_OR_EQUAL:
-                    current_result = first_value <= second_value
-
-            if result is None:
-                result = current_result
-            elif part.next_part_operator == ConditionPartNextPartOperator.AND:
-                result = result and current_result
-            elif part.next_part_operator == ConditionPartNextPartOperator.OR:
-                result = result or current_result
+            # Parts which can't change the result, or are ignored because of a missing
+            # operator, aren't evaluated at all.
+            if (
+                result is None
+                or (
+                    part.next_part_operator == ConditionPartNextPartOperator.AND
+                    and result
+                )
+                or (
+                    part.next_part_operator == ConditionPartNextPartOperator.OR
+                    and not result
+                )
+            ):
+                result = await self._evaluate_part(part, context.variables)
 
         return condition.source_connections if result else None
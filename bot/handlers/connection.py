@@ -70,12 +70,19 @@ class ConnectionHandler(BaseHandler[Connection]):
             ),
         }
 
+    async def _get_object(
+        self, type: ConnectionTargetObjectType, id: int
+    ) -> ServiceObject:
+        if self.bot.graph and (obj := self.bot.graph.get(type, id)):
+            return obj
+        return await self.fetchers[type](id)
+
     async def handle(
         self, update: Update, connection: Connection, context: HandlerContext
     ) -> None:
         context = context.copy()
-        obj: ServiceObject = await self.fetchers[connection.target_object_type](
-            connection.target_object_id
+        obj: ServiceObject = await self._get_object(
+            connection.target_object_type, connection.target_object_id
         )
         connections: list[Connection] | None = await self.handlers[
             connection.target_object_type
@@ -69,4 +69,6 @@ class DatabaseOperationHandler(BaseHandler[DatabaseOperation]):
         else:
             return None
 
+        context.variables.invalidate('DATABASE')
+
         return database_operation.source_connections
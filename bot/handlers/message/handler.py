@@ -26,9 +26,27 @@ class MessageHandler(BaseHandler[ServiceMessage]):
     async def _delete_last_bot_messages(
         self, chat: Chat, chat_storage: Storage[ChatStorageData]
     ) -> None:
-        async with chat_storage.transaction() as storage_data:
-            last_bot_message_ids: list[int] = storage_data.last_bot_message_ids.copy()
-            storage_data.last_bot_message_ids.clear()
+        popped_ids: list[int] | None = None
+
+        # The mutation can be re-applied to newer data, when the storage is written
+        # concurrently. Only the ids popped at first are removed then, because only
+        # those messages are deleted.
+        def pop_last_bot_message_ids(storage_data: ChatStorageData) -> list[int]:
+            nonlocal popped_ids
+
+            if popped_ids is None:
+                popped_ids = storage_data.last_bot_message_ids.copy()
+
+            storage_data.last_bot_message_ids = [
+                message_id
+                for message_id in storage_data.last_bot_message_ids
+                if message_id not in popped_ids
+            ]
+            return popped_ids
+
+        last_bot_message_ids: list[int] = await chat_storage.update(
+            pop_last_bot_message_ids
+        )
 
         if not last_bot_message_ids:
             return
@@ -154,11 +172,13 @@ class MessageHandler(BaseHandler[ServiceMessage]):
                 )
             )
 
-        async with chat_storage.transaction() as storage_data:
+        def set_last_bot_message_ids(storage_data: ChatStorageData) -> None:
             storage_data.last_bot_message_ids = [
                 last_bot_message.message_id for last_bot_message in last_bot_messages
             ]
 
+        await chat_storage.update(set_last_bot_message_ids)
+
     async def handle(
         self, update: Update, message: ServiceMessage, context: HandlerContext
     ) -> list[Connection] | None:
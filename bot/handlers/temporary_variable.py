@@ -3,8 +3,7 @@ from telegram.models import Update
 from service.models import Connection, TemporaryVariable
 
 from ..context import HandlerContext
-from ..storage import Storage
-from ..storage.models import UserStorageData
+from ..storage import UserStorage
 from ..utils.variables import replace_text_variables
 from .base import BaseHandler
 
@@ -13,14 +12,13 @@ class TemporaryVariableHandler(BaseHandler[TemporaryVariable]):
     async def handle(
         self, update: Update, variable: TemporaryVariable, context: HandlerContext
     ) -> list[Connection] | None:
-        user_storage: Storage[UserStorageData] | None = context.user_storage
+        user_storage: UserStorage | None = context.user_storage
 
         if not user_storage:
             return None
 
-        async with user_storage.transaction() as storage_data:
-            storage_data.temporary_variables[
-                variable.name
-            ] = await replace_text_variables(variable.value, context.variables)
+        value: str = await replace_text_variables(variable.value, context.variables)
+        await user_storage.set_temporary_variable(variable.name, value)
+        context.variables.invalidate('TEMPORARY')
 
         return variable.source_connections
@@ -3,8 +3,8 @@ from telegram.models import Chat, Update, User
 from service.models import Trigger
 
 from ..context import HandlerContext
-from ..storage import Storage
-from ..storage.models import TriggerSubscriber, UserStorageData
+from ..storage import UserStorage
+from ..storage.models import TriggerSubscriber
 from .base import BaseHandler
 
 
@@ -16,18 +16,16 @@ class TriggerHandler(BaseHandler[Trigger]):
         user: User | None = update.effective_user
 
         if chat and trigger.webhook is not None:
-            async with self.bot.storage.transaction() as storage_data:
-                storage_data.expected_triggers.setdefault(trigger.id, set()).add(
-                    TriggerSubscriber(
-                        chat_id=chat.id, user_id=user.id if user else None
-                    )
-                )
+            subscriber = TriggerSubscriber(
+                chat_id=chat.id, user_id=user.id if user else None
+            )
+
+            await self.bot.trigger_subscribers.add(trigger.id, subscriber)
             return
 
-        user_storage: Storage[UserStorageData] | None = context.user_storage
+        user_storage: UserStorage | None = context.user_storage
 
         if not user_storage:
             return
 
-        async with user_storage.transaction() as storage_data:
-            storage_data.expected_trigger_id = trigger.id
+        await user_storage.set_expected_trigger_id(trigger.id)
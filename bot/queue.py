@@ -0,0 +1,101 @@
+from telegram.models import Chat, Update, User
+
+from array import array
+from collections import deque
+from typing import TYPE_CHECKING, Any
+import asyncio
+import logging
+
+if TYPE_CHECKING:
+    from .bot import Bot
+else:
+    Bot = Any
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateIdWindow:
+    def __init__(self, size: int) -> None:
+        self.size = size
+        # Each slot keeps the latest seen update id with the same remainder, so the
+        # window always covers the last `size` consecutive update ids.
+        self._ids: array[int] = array('q', [-1]) * size
+
+    def __contains__(self, update_id: int) -> bool:
+        return self._ids[update_id % self.size] == update_id
+
+    def add(self, update_id: int) -> None:
+        self._ids[update_id % self.size] = update_id
+
+
+class UpdateQueue:
+    def __init__(self, max_size: int, concurrency: int) -> None:
+        self.max_size = max_size
+        self.concurrency = concurrency
+        self.size: int = 0
+        self.in_flight: int = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # Each update keeps the bot it was received by, so a lane that outlives a
+        # restart of the bot doesn't hand later updates to the stopped instance.
+        self._lanes: dict[tuple[int, int], deque[tuple[Bot, Update]]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def lanes(self) -> int:
+        return len(self._lanes)
+
+    def _get_lane_key(self, bot: Bot, update: Update) -> tuple[int, int]:
+        chat: Chat | None = update.effective_chat
+        user: User | None = update.effective_user
+
+        if chat:
+            return bot.service_id, chat.id
+        elif user:
+            return bot.service_id, user.id
+
+        # Updates without a chat and a user don't need ordering.
+        return bot.service_id, -update.update_id
+
+    def put(self, bot: Bot, update: Update) -> bool:
+        if self.size >= self.max_size:
+            return False
+
+        self.size += 1
+        key: tuple[int, int] = self._get_lane_key(bot, update)
+        lane: deque[tuple[Bot, Update]] | None = self._lanes.get(key)
+
+        if lane is not None:
+            lane.append((bot, update))
+            return True
+
+        self._lanes[key] = deque([(bot, update)])
+
+        task: asyncio.Task[None] = asyncio.create_task(self._run_lane(key))
+        task.add_done_callback(self._tasks.discard)
+        self._tasks.add(task)
+
+        return True
+
+    async def _run_lane(self, key: tuple[int, int]) -> None:
+        lane: deque[tuple[Bot, Update]] = self._lanes[key]
+
+        try:
+            while lane:
+                bot, update = lane.popleft()
+
+                async with self._semaphore:
+                    self.in_flight += 1
+
+                    try:
+                        await bot.feed_webhook_update(update)
+                    except Exception:
+                        logger.exception(
+                            'Failed processing of update (id=%s) for bot (service_id=%s).',
+                            update.update_id,
+                            bot.service_id,
+                        )
+                    finally:
+                        self.in_flight -= 1
+                        self.size -= 1
+        finally:
+            del self._lanes[key]
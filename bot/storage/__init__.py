@@ -1,3 +1,4 @@
-from .storage import Storage
+from .storage import Storage, UserStorage
+from .subscribers import TriggerSubscriberStorage
 
-__all__ = ['Storage']
+__all__ = ['Storage', 'TriggerSubscriberStorage', 'UserStorage']
@@ -0,0 +1,107 @@
+from core.redis import redis
+
+from .models import ChatStorageData
+from .storage import Storage
+
+from collections.abc import Awaitable, Callable
+from typing import Final
+import argparse
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_BOT_ID: Final[int] = -1
+
+type UpdateFunc = Callable[
+    [Storage[ChatStorageData], Callable[[ChatStorageData], None]], Awaitable[None]
+]
+
+
+async def update_with_lock(
+    storage: Storage[ChatStorageData], mutate: Callable[[ChatStorageData], None]
+) -> None:
+    async with storage.transaction() as data:
+        mutate(data)
+
+
+async def update_optimistically(
+    storage: Storage[ChatStorageData], mutate: Callable[[ChatStorageData], None]
+) -> None:
+    await storage._update_optimistically(mutate)
+
+
+ENGINES: Final[dict[str, UpdateFunc]] = {
+    'lock': update_with_lock,
+    'optimistic': update_optimistically,
+}
+
+
+async def run_benchmark(
+    engine: str, update: UpdateFunc, chats: int, workers: int, updates: int
+) -> None:
+    storages: list[Storage[ChatStorageData]] = [
+        Storage.for_chat(BENCHMARK_BOT_ID, chat_id) for chat_id in range(chats)
+    ]
+    await redis.delete(*[storage.redis_key for storage in storages])
+
+    failures: int = 0
+
+    async def worker(worker_id: int) -> None:
+        nonlocal failures
+
+        storage: Storage[ChatStorageData] = storages[worker_id % chats]
+
+        def mutate(data: ChatStorageData) -> None:
+            data.last_bot_message_ids.append(worker_id)
+
+        for _ in range(updates):
+            try:
+                await update(storage, mutate)
+            except Exception:
+                failures += 1
+
+    started_at: float = time.perf_counter()
+    await asyncio.gather(*[worker(worker_id) for worker_id in range(workers)])
+    duration: float = time.perf_counter() - started_at
+
+    # Every successful update appends one id, so missing ids are lost updates.
+    lost_updates: int = workers * updates - failures
+
+    for storage in storages:
+        lost_updates -= len((await storage.get_data()).last_bot_message_ids)
+
+    await redis.delete(*[storage.redis_key for storage in storages])
+
+    logger.info(
+        '%s: %d updates of %d chats by %d workers in %.3fs (%.0f/s), '
+        '%d failed, %d lost.',
+        engine,
+        workers * updates,
+        chats,
+        workers,
+        duration,
+        workers * updates / duration,
+        failures,
+        lost_updates,
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Compare the transaction engines of the storage.'
+    )
+    parser.add_argument('--chats', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=10)
+    parser.add_argument('--updates', type=int, default=100)
+    args = parser.parse_args()
+
+    for engine, update in ENGINES.items():
+        await run_benchmark(engine, update, args.chats, args.workers, args.updates)
+
+    await redis.aclose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
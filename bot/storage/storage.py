@@ -1,17 +1,59 @@
+from redis.exceptions import WatchError
 import msgspec
 
+from core.enums import StorageTransactionEngine, UserStorageLayout
 from core.msgspec import json_encoder
 from core.redis import redis
+from core.settings import STORAGE_TRANSACTION_ENGINE, USER_STORAGE_LAYOUT
 
 from .models import BotStorageData, ChatStorageData, UserStorageData
+from .unit_of_work import OPTIMISTIC_TRANSACTION_ATTEMPTS, StorageUnitOfWork
 
 from collections.abc import AsyncIterator, Callable
 from contextlib import asynccontextmanager
+from typing import Final
 
 bot_storage_decoder = msgspec.json.Decoder(BotStorageData)
 chat_storage_decoder = msgspec.json.Decoder(ChatStorageData)
 user_storage_decoder = msgspec.json.Decoder(UserStorageData)
 
+USER_STORAGE_EXPECTED_TRIGGER_ID_FIELD: Final[str] = 'expected_trigger_id'
+USER_STORAGE_TEMPORARY_VARIABLE_FIELD_PREFIX: Final[str] = 'temporary_variables:'
+
+# Returns the field from the hash or, if the hash doesn't exist yet, the legacy JSON.
+read_user_storage_field_script = redis.register_script(
+    """
+    if redis.call('EXISTS', KEYS[1]) == 1 then
+        return {1, redis.call('HGET', KEYS[1], ARGV[1])}
+    end
+    return {0, redis.call('GET', KEYS[2])}
+    """
+)
+# Sets the field (or deletes it, if no value is passed) unless the legacy JSON
+# still has to be migrated.
+write_user_storage_field_script = redis.register_script(
+    """
+    if redis.call('EXISTS', KEYS[1]) == 0 and redis.call('EXISTS', KEYS[2]) == 1 then
+        return 0
+    end
+    if #ARGV == 2 then
+        redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    else
+        redis.call('HDEL', KEYS[1], ARGV[1])
+    end
+    return 1
+    """
+)
+migrate_user_storage_script = redis.register_script(
+    """
+    if redis.call('EXISTS', KEYS[1]) == 0 and #ARGV > 0 then
+        redis.call('HSET', KEYS[1], unpack(ARGV))
+    end
+    redis.call('DEL', KEYS[2])
+    return 1
+    """
+)
+
 
 class Storage[T: msgspec.Struct]:
     def __init__(
@@ -22,9 +64,11 @@ class Storage[T: msgspec.Struct]:
         decoder: msgspec.json.Decoder[T],
         chat_id: int | None = None,
         user_id: int | None = None,
+        unit_of_work: StorageUnitOfWork | None = None,
     ) -> None:
         self.default_factory = default_factory
         self.decoder = decoder
+        self.unit_of_work = unit_of_work
 
         key_parts: list[str] = ['tbh', str(bot_id)]
 
@@ -42,36 +86,86 @@ class Storage[T: msgspec.Struct]:
         )
 
     @classmethod
-    def for_chat(cls, bot_id: int, chat_id: int) -> Storage[ChatStorageData]:
+    def for_chat(
+        cls,
+        bot_id: int,
+        chat_id: int,
+        unit_of_work: StorageUnitOfWork | None = None,
+    ) -> Storage[ChatStorageData]:
         return Storage(
             bot_id=bot_id,
             chat_id=chat_id,
             default_factory=ChatStorageData,
             decoder=chat_storage_decoder,
+            unit_of_work=unit_of_work,
         )
 
     @classmethod
     def for_user(
-        cls, bot_id: int, chat_id: int, user_id: int
-    ) -> Storage[UserStorageData]:
-        return Storage(
+        cls,
+        bot_id: int,
+        chat_id: int,
+        user_id: int,
+        unit_of_work: StorageUnitOfWork | None = None,
+    ) -> UserStorage:
+        return UserStorage(
             bot_id=bot_id,
             chat_id=chat_id,
             user_id=user_id,
             default_factory=UserStorageData,
             decoder=user_storage_decoder,
+            unit_of_work=unit_of_work,
         )
 
     @asynccontextmanager
     async def transaction(self) -> AsyncIterator[T]:
         async with redis.lock(f'{self.redis_key}:lock', timeout=3):
-            data: T = await self.get_data()
+            data: T = await self._get_data()
             yield data
             await self._set_data(data)
 
+    async def update[R](self, mutate: Callable[[T], R]) -> R:
+        if self.unit_of_work and not self.unit_of_work.is_closed:
+            data: T = await self.unit_of_work.get_data(self)
+
+            # After the commit of the unit of work its data can't be changed anymore.
+            if not self.unit_of_work.is_closed:
+                return self.unit_of_work.apply(self, data, mutate)
+
+        if STORAGE_TRANSACTION_ENGINE == StorageTransactionEngine.LOCK:
+            async with self.transaction() as data:
+                return mutate(data)
+
+        return await self._update_optimistically(mutate)
+
+    async def _update_optimistically[R](self, mutate: Callable[[T], R]) -> R:
+        attempt: int = 0
+
+        async with redis.pipeline(transaction=True) as pipeline:
+            while True:
+                try:
+                    await pipeline.watch(self.redis_key)
+                    data: T = self.decode_data(await pipeline.get(self.redis_key))
+                    result: R = mutate(data)
+                    pipeline.multi()
+                    pipeline.set(self.redis_key, json_encoder.encode(data))
+                    await pipeline.execute()
+                    return result
+                except WatchError:
+                    attempt += 1
+
+                    if attempt >= OPTIMISTIC_TRANSACTION_ATTEMPTS:
+                        raise
+
     async def get_data(self) -> T:
-        response: bytes | None = await redis.get(self.redis_key)
+        if self.unit_of_work and not self.unit_of_work.is_closed:
+            return await self.unit_of_work.get_data(self)
+        return await self._get_data()
+
+    async def _get_data(self) -> T:
+        return self.decode_data(await redis.get(self.redis_key))
 
+    def decode_data(self, response: bytes | None) -> T:
         if not response:
             return self.default_factory()
 
@@ -82,3 +176,113 @@ class Storage[T: msgspec.Struct]:
 
     async def _set_data(self, data: T) -> None:
         await redis.set(self.redis_key, json_encoder.encode(data))
+
+
+class UserStorage(Storage[UserStorageData]):
+    def __init__(
+        self,
+        *,
+        bot_id: int,
+        default_factory: Callable[[], UserStorageData],
+        decoder: msgspec.json.Decoder[UserStorageData],
+        chat_id: int | None = None,
+        user_id: int | None = None,
+        unit_of_work: StorageUnitOfWork | None = None,
+    ) -> None:
+        self.layout = USER_STORAGE_LAYOUT
+        super().__init__(
+            bot_id=bot_id,
+            default_factory=default_factory,
+            decoder=decoder,
+            chat_id=chat_id,
+            user_id=user_id,
+            # Fields of the hash are read and written one by one without locks.
+            unit_of_work=unit_of_work
+            if self.layout == UserStorageLayout.JSON
+            else None,
+        )
+        self.hash_redis_key = f'{self.redis_key}:hash'
+
+    async def _migrate_to_hash(self) -> None:
+        data: UserStorageData = await self._get_data()
+        fields: list[str] = []
+
+        if data.expected_trigger_id is not None:
+            fields.extend(
+                [USER_STORAGE_EXPECTED_TRIGGER_ID_FIELD, str(data.expected_trigger_id)]
+            )
+
+        for name, value in data.temporary_variables.items():
+            fields.extend([USER_STORAGE_TEMPORARY_VARIABLE_FIELD_PREFIX + name, value])
+
+        await migrate_user_storage_script(
+            keys=[self.hash_redis_key, self.redis_key], args=fields
+        )
+
+    async def _get_hash_field(
+        self, field: str, get_legacy_value: Callable[[UserStorageData], str | None]
+    ) -> str | None:
+        is_migrated, response = await read_user_storage_field_script(
+            keys=[self.hash_redis_key, self.redis_key], args=[field]
+        )
+
+        if is_migrated:
+            return response.decode() if response else None
+
+        return get_legacy_value(self.decode_data(response))
+
+    async def _set_hash_field(self, field: str, value: str | None = None) -> None:
+        args: list[str] = [field] if value is None else [field, value]
+
+        while not await write_user_storage_field_script(
+            keys=[self.hash_redis_key, self.redis_key], args=args
+        ):
+            await self._migrate_to_hash()
+
+    async def get_expected_trigger_id(self) -> int | None:
+        if self.layout == UserStorageLayout.JSON:
+            return (await self.get_data()).expected_trigger_id
+
+        value: str | None = await self._get_hash_field(
+            USER_STORAGE_EXPECTED_TRIGGER_ID_FIELD,
+            lambda data: (
+                str(data.expected_trigger_id)
+                if data.expected_trigger_id is not None
+                else None
+            ),
+        )
+        return int(value) if value else None
+
+    async def set_expected_trigger_id(self, trigger_id: int | None) -> None:
+        if self.layout == UserStorageLayout.HASH:
+            await self._set_hash_field(
+                USER_STORAGE_EXPECTED_TRIGGER_ID_FIELD,
+                str(trigger_id) if trigger_id is not None else None,
+            )
+            return
+
+        def set_expected_trigger_id(data: UserStorageData) -> None:
+            data.expected_trigger_id = trigger_id
+
+        await self.update(set_expected_trigger_id)
+
+    async def get_temporary_variable(self, name: str) -> str | None:
+        if self.layout == UserStorageLayout.JSON:
+            return (await self.get_data()).temporary_variables.get(name)
+
+        return await self._get_hash_field(
+            USER_STORAGE_TEMPORARY_VARIABLE_FIELD_PREFIX + name,
+            lambda data: data.temporary_variables.get(name),
+        )
+
+    async def set_temporary_variable(self, name: str, value: str) -> None:
+        if self.layout == UserStorageLayout.HASH:
+            await self._set_hash_field(
+                USER_STORAGE_TEMPORARY_VARIABLE_FIELD_PREFIX + name, value
+            )
+            return
+
+        def set_temporary_variable(data: UserStorageData) -> None:
+            data.temporary_variables[name] = value
+
+        await self.update(set_temporary_variable)
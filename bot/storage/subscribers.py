@@ -0,0 +1,58 @@
+import msgspec
+
+from core.msgspec import json_encoder
+from core.redis import redis
+
+from .models import BotStorageData, TriggerSubscriber
+from .storage import Storage
+
+trigger_subscriber_decoder = msgspec.json.Decoder(TriggerSubscriber)
+
+
+class TriggerSubscriberStorage:
+    def __init__(self, bot_id: int) -> None:
+        self.bot_id = bot_id
+        self.bot_storage = Storage.for_bot(bot_id)
+
+    def _get_redis_key(self, trigger_id: int) -> str:
+        return f'tbh:{self.bot_id}:triggers:{trigger_id}'
+
+    async def add(self, trigger_id: int, subscriber: TriggerSubscriber) -> None:
+        await redis.sadd(
+            self._get_redis_key(trigger_id), json_encoder.encode(subscriber)
+        )
+
+    async def pop(self, trigger_id: int, count: int) -> list[TriggerSubscriber]:
+        responses: list[bytes] | None = await redis.spop(
+            self._get_redis_key(trigger_id), count
+        )
+        return [
+            trigger_subscriber_decoder.decode(response) for response in responses or []
+        ]
+
+    async def migrate(self) -> None:
+        storage_data: BotStorageData = await self.bot_storage.get_data()
+
+        if not storage_data.expected_triggers:
+            return
+
+        async with redis.pipeline(transaction=False) as pipeline:
+            for trigger_id, subscribers in storage_data.expected_triggers.items():
+                if subscribers:
+                    pipeline.sadd(
+                        self._get_redis_key(trigger_id),
+                        *[
+                            json_encoder.encode(subscriber)
+                            for subscriber in subscribers
+                        ],
+                    )
+
+            await pipeline.execute()
+
+        migrated_trigger_ids: list[int] = list(storage_data.expected_triggers)
+
+        def remove_migrated_triggers(storage_data: BotStorageData) -> None:
+            for trigger_id in migrated_trigger_ids:
+                storage_data.expected_triggers.pop(trigger_id, None)
+
+        await self.bot_storage.update(remove_migrated_triggers)
@@ -0,0 +1,132 @@
+from redis.exceptions import WatchError
+import msgspec
+
+from core.enums import StorageTransactionEngine
+from core.msgspec import json_encoder
+from core.redis import redis
+from core.settings import STORAGE_TRANSACTION_ENGINE
+
+from collections.abc import Callable, Sequence
+from contextlib import AsyncExitStack
+from typing import TYPE_CHECKING, Any, Final, cast
+import asyncio
+
+if TYPE_CHECKING:
+    from .storage import Storage
+else:
+    Storage = Any
+
+OPTIMISTIC_TRANSACTION_ATTEMPTS: Final[int] = 10
+
+
+class StorageUnitOfWork:
+    def __init__(self) -> None:
+        self.is_closed: bool = False
+        self._storages: dict[str, Storage[Any]] = {}
+        self._loads: dict[str, asyncio.Future[None]] = {}
+        self._responses: dict[str, bytes | None] = {}
+        self._data: dict[str, msgspec.Struct] = {}
+        # Mutations are kept to re-apply them, if the data was changed elsewhere
+        # before the commit.
+        self._mutations: dict[str, list[Callable[[Any], Any]]] = {}
+
+    def register(self, storage: Storage[Any]) -> None:
+        self._storages.setdefault(storage.redis_key, storage)
+
+    async def _load(self, storages: Sequence[Storage[Any]]) -> None:
+        responses: list[bytes | None] = await redis.mget(
+            [storage.redis_key for storage in storages]
+        )
+
+        for storage, response in zip(storages, responses, strict=True):
+            self._responses[storage.redis_key] = response
+            self._data[storage.redis_key] = storage.decode_data(response)
+
+    async def get_data[T: msgspec.Struct](self, storage: Storage[T]) -> T:
+        self.register(storage)
+
+        load: asyncio.Future[None] | None = self._loads.get(storage.redis_key)
+
+        if not load:
+            # Load all registered storages at once, because all of them are usually
+            # needed during the processing of an update.
+            storages: list[Storage[Any]] = [
+                registered_storage
+                for key, registered_storage in self._storages.items()
+                if key not in self._loads
+            ]
+            load = asyncio.ensure_future(self._load(storages))
+
+            for registered_storage in storages:
+                self._loads[registered_storage.redis_key] = load
+
+        await asyncio.shield(load)
+
+        return cast(T, self._data[storage.redis_key])
+
+    def apply[T: msgspec.Struct, R](
+        self, storage: Storage[T], data: T, mutate: Callable[[T], R]
+    ) -> R:
+        # The mutation works on a copy, so a failed one doesn't leave partial changes.
+        data = storage.decoder.decode(json_encoder.encode(data))
+        result: R = mutate(data)
+        self._data[storage.redis_key] = data
+        self._mutations.setdefault(storage.redis_key, []).append(mutate)
+        return result
+
+    async def commit(self) -> None:
+        self.is_closed = True
+
+        if not self._mutations:
+            return
+
+        # Sorted, so commits of overlapping keys take their locks in the same order.
+        keys: list[str] = sorted(self._mutations)
+
+        async with AsyncExitStack() as stack:
+            # Writers of the lock engine don't watch their keys, so they are kept out
+            # by the same locks.
+            if STORAGE_TRANSACTION_ENGINE == StorageTransactionEngine.LOCK:
+                for key in keys:
+                    await stack.enter_async_context(
+                        redis.lock(f'{key}:lock', timeout=3)
+                    )
+
+            await self._write(keys)
+
+        self._mutations.clear()
+
+    async def _write(self, keys: list[str]) -> None:
+        attempt: int = 0
+
+        async with redis.pipeline(transaction=True) as pipeline:
+            while True:
+                try:
+                    await pipeline.watch(*keys)
+                    responses: list[bytes | None] = await pipeline.mget(keys)
+
+                    for key, response in zip(keys, responses, strict=True):
+                        if response != self._responses[key]:
+                            self._reapply(key, response)
+
+                    pipeline.multi()
+
+                    for key in keys:
+                        pipeline.set(key, json_encoder.encode(self._data[key]))
+
+                    await pipeline.execute()
+                    return
+                except WatchError:
+                    attempt += 1
+
+                    if attempt >= OPTIMISTIC_TRANSACTION_ATTEMPTS:
+                        raise
+
+    def _reapply(self, key: str, response: bytes | None) -> None:
+        data: msgspec.Struct = self._storages[key].decode_data(response)
+
+        for mutate in self._mutations[key]:
+            mutate(data)
+
+        self._responses[key] = response
+        self._data[key] = data
@@ -1,5 +1,12 @@
+import msgspec
+
+from core.msgspec import json_decoder, json_encoder
+
 from .deserializers import deserialize_text
 
+from collections.abc import Sequence
+from functools import lru_cache
+from operator import itemgetter
 from typing import TYPE_CHECKING, Any, Final, Literal, overload
 import asyncio
 import re
@@ -11,34 +18,180 @@ else:
 
 
 VARIABLE_PATTERN: Final[re.Pattern[str]] = re.compile(r'\{\{([^{}]+)\}\}')
+TEMPLATE_CACHE_MAX_SIZE: Final[int] = 4096
+
+
+class Template:
+    __slots__ = ('keys', 'literals', 'placeholders')
+
+    def __init__(self, text: str) -> None:
+        matches: list[re.Match[str]] = list(VARIABLE_PATTERN.finditer(text))
+
+        self.keys: tuple[str, ...] = tuple(match.group(1).strip() for match in matches)
+        self.placeholders: tuple[str, ...] = tuple(match.group(0) for match in matches)
+
+        literals: list[str] = []
+        last_end_index: int = 0
+
+        for match in matches:
+            start_index, end_index = match.span()
+            literals.append(text[last_end_index:start_index])
+            last_end_index = end_index
+        literals.append(text[last_end_index:])
+
+        self.literals: tuple[str, ...] = tuple(literals)
+
+    def render(self, values: dict[str, Any | None]) -> str:
+        result: list[str] = [self.literals[0]]
+
+        for key, placeholder, literal in zip(
+            self.keys, self.placeholders, self.literals[1:], strict=True
+        ):
+            value: Any | None = values[key]
+            result.extend([str(value) if value is not None else placeholder, literal])
 
+        return ''.join(result)
 
-async def _replace_text_variables(text: str, variables: Variables) -> str:
-    matches: list[re.Match[str]] = list(VARIABLE_PATTERN.finditer(text))
 
-    if not matches:
-        return text
+@lru_cache(maxsize=TEMPLATE_CACHE_MAX_SIZE)
+def compile_template(text: str) -> Template:
+    return Template(text)
 
-    keys: list[str] = [match.group(1).strip() for match in matches]
-    values: list[Any | None] = await asyncio.gather(
-        *[variables.get(key) for key in keys]
-    )
 
-    result: list[str] = []
-    last_end_index: int = 0
+def _build_node(node: tuple[bool, Any], texts: Sequence[str]) -> Any:
+    is_constant, value = node
+    return value if is_constant else value(texts)
 
-    for match, value in zip(matches, values, strict=False):
-        start_index, end_index = match.span()
-        result.extend(
-            [
-                text[last_end_index:start_index],
-                str(value) if value is not None else match.group(0),
+
+class DataTemplate:
+    __slots__ = ('_build', '_is_constant', '_text_indexes', 'texts')
+
+    def __init__(self, data: Any, deserialize: bool) -> None:
+        self.texts: list[str] = []
+        self._text_indexes: dict[str, int] = {}
+        self._is_constant, self._build = self._compile(data, deserialize)
+
+    def _compile(self, data: Any, deserialize: bool) -> tuple[bool, Any]:
+        # Constant subtrees are built once and shared between renders, other nodes
+        # are compiled into builders taking the rendered texts.
+        if isinstance(data, str):
+            if not VARIABLE_PATTERN.search(data):
+                return True, deserialize_text(data) if deserialize else data
+
+            if data not in self._text_indexes:
+                self._text_indexes[data] = len(self.texts)
+                self.texts.append(data)
+
+            index: int = self._text_indexes[data]
+
+            if deserialize:
+                return False, lambda texts: deserialize_text(texts[index])
+            return False, itemgetter(index)
+        elif isinstance(data, tuple | list | set | frozenset):
+            data_type: type[Any] = type(data)
+            items: list[tuple[bool, Any]] = [
+                self._compile(item, deserialize) for item in data
             ]
-        )
-        last_end_index = end_index
-    result.append(text[last_end_index:])
 
-    return ''.join(result)
+            if all(is_constant for is_constant, _ in items):
+                return True, data_type(value for _, value in items)
+            return False, lambda texts: data_type(
+                _build_node(item, texts) for item in items
+            )
+        elif isinstance(data, dict):
+            pairs: list[tuple[tuple[bool, Any], tuple[bool, Any]]] = [
+                (
+                    self._compile(key, deserialize=False),
+                    self._compile(value, deserialize),
+                )
+                for key, value in data.items()
+            ]
+
+            if all(key[0] and value[0] for key, value in pairs):
+                return True, {key[1]: value[1] for key, value in pairs}
+            return False, lambda texts: {
+                _build_node(key, texts): _build_node(value, texts)
+                for key, value in pairs
+            }
+
+        return True, data
+
+    async def render(self, variables: Variables) -> Any:
+        if self._is_constant:
+            return self._build
+
+        return self._build(await _replace_texts_variables(self.texts, variables))
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_MAX_SIZE)
+def compile_data_template(encoded_data: bytes, deserialize: bool) -> DataTemplate:
+    return DataTemplate(json_decoder.decode(encoded_data), deserialize)
+
+
+def _collect_values(
+    template: Template,
+    variables: Variables,
+    values: dict[str, Any | None],
+    async_keys: list[str],
+) -> None:
+    for key in template.keys:
+        if key in values or key in async_keys:
+            continue
+        elif variables.is_async_key(key):
+            async_keys.append(key)
+        else:
+            values[key] = variables.get_nowait(key)
+
+
+async def _replace_texts_variables(
+    texts: Sequence[str], variables: Variables
+) -> list[str]:
+    final_texts: list[str] = list(texts)
+    pending_indexes: list[int] = list(range(len(final_texts)))
+
+    for index in range(3):
+        templates: dict[int, Template] = {}
+        values: dict[str, Any | None] = {}
+        async_keys: list[str] = []
+
+        for text_index in pending_indexes:
+            # Only source templates are cached, texts of the next passes are rendered
+            # ones.
+            template: Template = (
+                compile_template(final_texts[text_index])
+                if index == 0
+                else Template(final_texts[text_index])
+            )
+
+            if template.keys:
+                templates[text_index] = template
+                _collect_values(template, variables, values, async_keys)
+
+        if not templates:
+            break
+
+        if async_keys:
+            values.update(
+                zip(
+                    async_keys,
+                    await asyncio.gather(*[variables.get(key) for key in async_keys]),
+                    strict=True,
+                )
+            )
+
+        pending_indexes = []
+
+        for text_index, template in templates.items():
+            next_text: str = template.render(values)
+
+            if next_text != final_texts[text_index]:
+                final_texts[text_index] = next_text
+                pending_indexes.append(text_index)
+
+        if not pending_indexes:
+            break
+
+    return final_texts
 
 
 @overload
@@ -58,15 +211,7 @@ async def replace_text_variables(
 async def replace_text_variables(
     text: str, variables: Variables, deserialize: bool = False
 ) -> str | int | float | bool:
-    final_text: str = text
-
-    for _ in range(3):
-        next_text: str = await _replace_text_variables(final_text, variables)
-
-        if next_text == final_text:
-            break
-
-        final_text = next_text
+    final_text: str = (await _replace_texts_variables([text], variables))[0]
 
     if deserialize:
         return deserialize_text(final_text)
@@ -79,21 +224,12 @@ async def replace_data_variables(
 ) -> Any:
     if isinstance(data, str):
         return await replace_text_variables(data, variables, deserialize)
-    elif isinstance(data, tuple | list | set | frozenset):
-        return type(data)(
-            await asyncio.gather(
-                *[replace_data_variables(item, variables, deserialize) for item in data]
-            )
-        )
-    elif isinstance(data, dict):
-        keys, values = await asyncio.gather(
-            asyncio.gather(*[replace_data_variables(key, variables) for key in data]),
-            asyncio.gather(
-                *[
-                    replace_data_variables(value, variables, deserialize)
-                    for value in data.values()
-                ]
-            ),
+
+    try:
+        template: DataTemplate = compile_data_template(
+            json_encoder.encode(data), deserialize
         )
-        return dict(zip(keys, values, strict=False))
-    return data
+    except TypeError, msgspec.EncodeError:
+        template = DataTemplate(data, deserialize)
+
+    return await template.render(variables)
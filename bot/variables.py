@@ -2,11 +2,12 @@ from telegram.models import Chat, Message, User
 
 from service.models import DatabaseRecord, Variable
 
-from .storage import Storage
-from .storage.models import UserStorageData
+from .storage import UserStorage
 from .utils.html import process_html_text
 
+from collections.abc import Awaitable, Callable
 from typing import TYPE_CHECKING, Any
+import asyncio
 import copy
 import re
 
@@ -26,10 +27,12 @@ class Variables:
         chat: Chat | None = None,
         user: User | None = None,
         message: Message | None = None,
-        user_storage: Storage[UserStorageData] | None = None,
+        user_storage: UserStorage | None = None,
     ):
         self.bot = bot
         self._user_storage = user_storage
+        # Shared between copies, so every context of one update reuses the lookups.
+        self._cache: dict[str, asyncio.Future[Any | None]] = {}
 
         self.store: dict[str, Any] = {}
         self.system_store: dict[str, Any] = {
@@ -81,6 +84,33 @@ class Variables:
         variables.store = self.store.copy()
         return variables
 
+    def _discard_failed_lookup(
+        self, key: str, future: asyncio.Future[Any | None]
+    ) -> None:
+        if (
+            not future.cancelled()
+            and future.exception()
+            and self._cache.get(key) is future
+        ):
+            del self._cache[key]
+
+    async def _lookup(
+        self, key: str, resolve: Callable[[], Awaitable[Any | None]]
+    ) -> Any | None:
+        future: asyncio.Future[Any | None] | None = self._cache.get(key)
+
+        if not future:
+            future = self._cache[key] = asyncio.ensure_future(resolve())
+            future.add_done_callback(
+                lambda future: self._discard_failed_lookup(key, future)
+            )
+
+        return await asyncio.shield(future)
+
+    def invalidate(self, prefix: str) -> None:
+        for key in [key for key in self._cache if key.startswith(f'{prefix}.')]:
+            del self._cache[key]
+
     def _resolve_value(self, data: Any, path: str) -> Any | None:
         try:
             for part in path.split('.'):
@@ -93,7 +123,9 @@ class Variables:
         name, _, new_path = path.partition('.')
         final_path: str | None = new_path or None
 
-        variables: list[Variable] = await self.bot.service.get_variables(name=name)
+        variables: list[Variable] = await self._lookup(
+            f'USER.{name}', lambda: self.bot.service.get_variables(name=name)
+        )
 
         if not variables:
             return None
@@ -120,8 +152,11 @@ class Variables:
         else:
             final_path = path
 
-        records: list[DatabaseRecord] = await self.bot.service.get_database_records(
-            search=search_value, has_data_path=final_path
+        records: list[DatabaseRecord] = await self._lookup(
+            f'DATABASE.[search={search_value}].{final_path}',
+            lambda: self.bot.service.get_database_records(
+                search=search_value, has_data_path=final_path
+            ),
         )
 
         if not records:
@@ -142,19 +177,19 @@ class Variables:
             self._resolve_value(record_data, final_path) if final_path else record_data
         )
 
-    async def get(self, key: str) -> Any | None:
+    def is_async_key(self, key: str) -> bool:
+        prefix, _, nested_key = key.partition('.')
+        return bool(nested_key) and (
+            prefix in ('USER', 'DATABASE')
+            or (prefix == 'TEMPORARY' and self._user_storage is not None)
+        )
+
+    def get_nowait(self, key: str) -> Any | None:
         prefix, _, nested_key = key.partition('.')
 
         if nested_key:
             if prefix == 'SYSTEM':
                 return self.system_store.get(nested_key)
-            elif prefix == 'USER':
-                return await self._resolve_user_value(nested_key)
-            elif prefix == 'TEMPORARY' and self._user_storage:
-                storage_data: UserStorageData = await self._user_storage.get_data()
-                return self._resolve_value(storage_data.temporary_variables, nested_key)
-            elif prefix == 'DATABASE':
-                return await self._resolve_database_value(nested_key)
             elif (value := self.store.get(prefix)) and isinstance(
                 value, dict | list | tuple | set
             ):
@@ -162,5 +197,26 @@ class Variables:
 
         return self.store.get(key)
 
+    async def get(self, key: str) -> Any | None:
+        if not self.is_async_key(key):
+            return self.get_nowait(key)
+
+        prefix, _, nested_key = key.partition('.')
+
+        if prefix == 'USER':
+            return await self._resolve_user_value(nested_key)
+        elif prefix == 'DATABASE':
+            return await self._resolve_database_value(nested_key)
+        elif user_storage := self._user_storage:
+            name, _, path = nested_key.partition('.')
+            temporary_value: str | None = await self._lookup(
+                f'TEMPORARY.{name}', lambda: user_storage.get_temporary_variable(name)
+            )
+            return (
+                self._resolve_value(temporary_value, path) if path else temporary_value
+            )
+
+        return None
+
     def add(self, key: str, value: Any) -> None:
         self.store[key] = value
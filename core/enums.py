@@ -5,3 +5,18 @@ class Mode(StrEnum):
     DEBUG = 'debug'
     LOCALE = 'locale'
     PRODUCTION = 'production'
+
+
+class UserStorageLayout(StrEnum):
+    JSON = 'json'
+    HASH = 'hash'
+
+
+class StorageTransactionEngine(StrEnum):
+    LOCK = 'lock'
+    OPTIMISTIC = 'optimistic'
+
+
+class TelegramRateLimiterBackend(StrEnum):
+    LOCAL = 'local'
+    REDIS = 'redis'
@@ -1,7 +1,12 @@
 from dotenv import load_dotenv
 from yarl import URL
 
-from .enums import Mode
+from .enums import (
+    Mode,
+    StorageTransactionEngine,
+    TelegramRateLimiterBackend,
+    UserStorageLayout,
+)
 
 from pathlib import Path
 from typing import Final
@@ -26,17 +31,79 @@ BOT_BACKGROUND_MONITOR_TOKEN_INTERVAL: Final[int] = 60 if MODE == Mode.DEBUG els
 BOT_BACKGROUND_PROCESS_SERVICE_TASKS_INTERVAL: Final[int] = (
     60 if MODE == Mode.DEBUG else 3600
 )
+BOT_FLOW_SNAPSHOT: Final[bool] = (
+    os.getenv('BOT_FLOW_SNAPSHOT', 'false').lower() == 'true'
+)
+
+UPDATE_QUEUE_MAX_SIZE: Final[int] = int(os.getenv('UPDATE_QUEUE_MAX_SIZE', '10000'))
+UPDATE_QUEUE_CONCURRENCY: Final[int] = int(os.getenv('UPDATE_QUEUE_CONCURRENCY', '100'))
+UPDATE_ID_WINDOW_SIZE: Final[int] = int(os.getenv('UPDATE_ID_WINDOW_SIZE', '1024'))
+
+API_REQUEST_POOL_SIZE: Final[int] = int(os.getenv('API_REQUEST_POOL_SIZE', '100'))
+API_REQUEST_POOL_SIZE_PER_HOST: Final[int] = int(
+    os.getenv('API_REQUEST_POOL_SIZE_PER_HOST', '10')
+)
+API_REQUEST_KEEPALIVE_TIMEOUT: Final[float] = float(
+    os.getenv('API_REQUEST_KEEPALIVE_TIMEOUT', '15')
+)
+API_REQUEST_RESPONSE_MAX_SIZE: Final[int] = int(
+    os.getenv('API_REQUEST_RESPONSE_MAX_SIZE', '2048')
+)
+API_REQUEST_RESPONSE_EXTRACTION: Final[bool] = (
+    os.getenv('API_REQUEST_RESPONSE_EXTRACTION', 'false').lower() == 'true'
+)
+API_REQUEST_RESPONSE_EXTRACTION_MAX_SIZE: Final[int] = int(
+    os.getenv('API_REQUEST_RESPONSE_EXTRACTION_MAX_SIZE', '1048576')
+)
+API_REQUEST_CACHE_MAX_SIZE: Final[int] = int(
+    os.getenv('API_REQUEST_CACHE_MAX_SIZE', '1000')
+)
+API_REQUEST_CACHE_STALE_TTL: Final[int] = int(
+    os.getenv('API_REQUEST_CACHE_STALE_TTL', '60')
+)
+API_REQUEST_DNS_CACHE_TTL: Final[int] = int(
+    os.getenv('API_REQUEST_DNS_CACHE_TTL', '60')
+)
+API_REQUEST_DNS_CACHE_MAX_SIZE: Final[int] = int(
+    os.getenv('API_REQUEST_DNS_CACHE_MAX_SIZE', '1024')
+)
 
 REDIS_URL: Final[str] = os.environ['REDIS_URL']
 
+STORAGE_TRANSACTION_ENGINE: Final[StorageTransactionEngine] = StorageTransactionEngine(
+    os.getenv('STORAGE_TRANSACTION_ENGINE', 'lock').lower()
+)
+USER_STORAGE_LAYOUT: Final[UserStorageLayout] = UserStorageLayout(
+    os.getenv('USER_STORAGE_LAYOUT', 'json').lower()
+)
+
 SELF_TOKEN: Final[str] = os.environ['SELF_TOKEN']
 TELEGRAM_TOKEN: Final[str] = os.environ['TELEGRAM_TOKEN']
+TELEGRAM_RATE_LIMITER_BACKEND: Final[TelegramRateLimiterBackend] = (
+    TelegramRateLimiterBackend(
+        os.getenv('TELEGRAM_RATE_LIMITER_BACKEND', 'local').lower()
+    )
+)
+TELEGRAM_RATE_LIMITER_LEASE_SIZE: Final[int] = int(
+    os.getenv('TELEGRAM_RATE_LIMITER_LEASE_SIZE', '5')
+)
 
 SERVICE_URL: Final[URL] = URL(os.environ['SERVICE_URL'])
 SERVICE_UNIX_SOCK: Final[Path | None] = (
     Path(path) if (path := os.getenv('SERVICE_UNIX_SOCK')) else None
 )
 SERVICE_TOKEN: Final[str] = os.environ['SERVICE_TOKEN']
+SERVICE_CACHE_TTL: Final[int] = int(os.getenv('SERVICE_CACHE_TTL', '3600'))
+SERVICE_CACHE_MAX_SIZE: Final[int] = int(os.getenv('SERVICE_CACHE_MAX_SIZE', '10000'))
+SERVICE_SUBJECT_CACHE_TTL: Final[int] = int(
+    os.getenv('SERVICE_SUBJECT_CACHE_TTL', '300')
+)
+SERVICE_WRITE_BEHIND_WINDOW: Final[int] = int(
+    os.getenv('SERVICE_WRITE_BEHIND_WINDOW', '0')
+)
+SERVICE_WRITE_BEHIND_SIZE: Final[int] = int(
+    os.getenv('SERVICE_WRITE_BEHIND_SIZE', '100')
+)
 
 
 logging.config.dictConfig(
@@ -0,0 +1,85 @@
+from collections.abc import Awaitable, Callable, Hashable
+import asyncio
+
+
+class WriteBehindBatcher[I, R]:
+    def __init__(
+        self,
+        flush: Callable[[list[I]], Awaitable[list[R]]],
+        window: float,
+        max_size: int,
+        key: Callable[[I], Hashable],
+        fallback: Callable[[I], Awaitable[R]] | None = None,
+    ) -> None:
+        self._flush_func = flush
+        self._fallback_func = fallback
+        self._key_func = key
+        self.window = window
+        self.max_size = max_size
+        # Items with the same key are sent once, the latest one wins.
+        self._items: dict[Hashable, tuple[I, list[asyncio.Future[R]]]] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_tasks: set[asyncio.Task[None]] = set()
+
+    async def submit(self, item: I) -> R:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        future: asyncio.Future[R] = loop.create_future()
+        key: Hashable = self._key_func(item)
+        queued_item: tuple[I, list[asyncio.Future[R]]] | None = self._items.get(key)
+        futures: list[asyncio.Future[R]] = queued_item[1] if queued_item else []
+        futures.append(future)
+        self._items[key] = (item, futures)
+
+        if len(self._items) >= self.max_size:
+            self._schedule_flush()
+        elif not self._flush_handle:
+            self._flush_handle = loop.call_later(self.window, self._schedule_flush)
+
+        return await future
+
+    def _schedule_flush(self) -> None:
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        items: list[tuple[I, list[asyncio.Future[R]]]] = list(self._items.values())
+        self._items = {}
+
+        if not items:
+            return
+
+        task: asyncio.Task[None] = asyncio.create_task(self._flush(items))
+        task.add_done_callback(self._flush_tasks.discard)
+        self._flush_tasks.add(task)
+
+    async def _flush(self, items: list[tuple[I, list[asyncio.Future[R]]]]) -> None:
+        results: list[R | BaseException]
+
+        try:
+            bulk_results: list[R] = await self._flush_func([item for item, _ in items])
+
+            if len(bulk_results) != len(items):
+                raise ValueError(  # noqa: TRY301
+                    f'Expected {len(items)} results of the batch, '
+                    f'got {len(bulk_results)}.'
+                )
+
+            results = list(bulk_results)
+        except Exception as error:
+            if not self._fallback_func:
+                results = [error] * len(items)
+            else:
+                # One bad item mustn't fail the others, so they are sent one by one.
+                results = await asyncio.gather(
+                    *[self._fallback_func(item) for item, _ in items],
+                    return_exceptions=True,
+                )
+
+        for (_, futures), result in zip(items, results, strict=True):
+            for future in futures:
+                if future.done():
+                    continue
+                elif isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
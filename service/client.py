@@ -3,9 +3,21 @@ from aiohttp.typedefs import LooseHeaders
 from yarl import URL
 import msgspec
 
+from core.cache import TTLCache
 from core.msgspec import json_encoder
-from core.settings import SERVICE_TOKEN, SERVICE_UNIX_SOCK, SERVICE_URL
+from core.settings import (
+    SERVICE_CACHE_MAX_SIZE,
+    SERVICE_CACHE_TTL,
+    SERVICE_SUBJECT_CACHE_TTL,
+    SERVICE_TOKEN,
+    SERVICE_UNIX_SOCK,
+    SERVICE_URL,
+    SERVICE_WRITE_BEHIND_SIZE,
+    SERVICE_WRITE_BEHIND_WINDOW,
+)
 
+from .batching import WriteBehindBatcher
+from .enums import ConnectionTargetObjectType, SubjectObjectType
 from .models import (
     APIRequest,
     BackgroundTask,
@@ -18,6 +30,7 @@ from .models import (
     Message,
     MessageKeyboardButton,
     Pagination,
+    ServiceObject,
     TemporaryVariable,
     Trigger,
     User,
@@ -33,7 +46,8 @@ from .schemas import (
 )
 
 from collections.abc import Iterable
-from typing import Any, Final, overload
+from typing import Any, Final, cast, overload
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -70,9 +84,11 @@ get_variable_decoder = msgspec.json.Decoder(Variable)
 get_chats_decoder = msgspec.json.Decoder(list[Chat] | Pagination[Chat])
 get_chat_decoder = msgspec.json.Decoder(Chat)
 create_chat_decoder = msgspec.json.Decoder(Chat)
+create_chats_decoder = msgspec.json.Decoder(list[Chat])
 get_users_decoder = msgspec.json.Decoder(list[User] | Pagination[User])
 get_user_decoder = msgspec.json.Decoder(User)
 create_user_decoder = msgspec.json.Decoder(User)
+create_users_decoder = msgspec.json.Decoder(list[User])
 get_database_records_decoder = msgspec.json.Decoder(list[DatabaseRecord])
 update_database_records_decoder = msgspec.json.Decoder(list[DatabaseRecord])
 get_database_record_decoder = msgspec.json.Decoder(DatabaseRecord)
@@ -87,6 +103,61 @@ class ServiceClient:
         self.root_url: URL = (
             SERVICE_URL / f'api/telegram-bots-hub/telegram-bots/{bot_service_id}/'
         )
+        self.bot_service_id = bot_service_id
+        self.cache_version: int | None = None
+        self._cache_generation: int = 0
+        self._subject_cache_generation: int = 0
+        self._object_cache: TTLCache[
+            tuple[ConnectionTargetObjectType, int], ServiceObject
+        ] = TTLCache(ttl=SERVICE_CACHE_TTL, maxsize=SERVICE_CACHE_MAX_SIZE)
+        self._bot_cache: TTLCache[int, Bot] = TTLCache(
+            ttl=SERVICE_SUBJECT_CACHE_TTL, maxsize=1
+        )
+        self._chat_cache: TTLCache[int, tuple[CreateChat, Chat]] = TTLCache(
+            ttl=SERVICE_SUBJECT_CACHE_TTL, maxsize=SERVICE_CACHE_MAX_SIZE
+        )
+        self._user_cache: TTLCache[int, tuple[CreateUser, User]] = TTLCache(
+            ttl=SERVICE_SUBJECT_CACHE_TTL, maxsize=SERVICE_CACHE_MAX_SIZE
+        )
+        self._chat_user_cache: TTLCache[tuple[int, int], bool] = TTLCache(
+            ttl=SERVICE_SUBJECT_CACHE_TTL, maxsize=SERVICE_CACHE_MAX_SIZE
+        )
+        self._chat_batcher: WriteBehindBatcher[CreateChat, Chat] | None = None
+        self._user_batcher: WriteBehindBatcher[CreateUser, User] | None = None
+        self._chat_user_batcher: (
+            WriteBehindBatcher[tuple[int, BindUserToChat], None] | None
+        ) = None
+
+        if SERVICE_WRITE_BEHIND_WINDOW:
+            self._chat_batcher = WriteBehindBatcher(
+                self.create_chats,
+                window=SERVICE_WRITE_BEHIND_WINDOW / 1000,
+                max_size=SERVICE_WRITE_BEHIND_SIZE,
+                key=lambda data: data['telegram_id'],
+                fallback=self._create_chat,
+            )
+            self._user_batcher = WriteBehindBatcher(
+                self.create_users,
+                window=SERVICE_WRITE_BEHIND_WINDOW / 1000,
+                max_size=SERVICE_WRITE_BEHIND_SIZE,
+                key=lambda data: data['telegram_id'],
+                fallback=self._create_user,
+            )
+            self._chat_user_batcher = WriteBehindBatcher(
+                self._bind_users_to_chats,
+                window=SERVICE_WRITE_BEHIND_WINDOW / 1000,
+                max_size=SERVICE_WRITE_BEHIND_SIZE,
+                key=lambda item: (
+                    item[0],
+                    item[1].get('id'),
+                    item[1].get('telegram_id'),
+                ),
+                fallback=self._bind_user_to_chat,
+            )
+
+        self._inflight_requests: dict[
+            tuple[str, str, tuple[tuple[str, str], ...]], asyncio.Task[bytes]
+        ] = {}
 
     @classmethod
     def get_session(cls) -> ClientSession:
@@ -115,6 +186,7 @@ class ServiceClient:
         decoder: msgspec.json.Decoder[T],
         data: Any | None = None,
         params: dict[str, str] | None = None,
+        coalesce: bool = False,
     ) -> T: ...
 
     @overload
@@ -125,6 +197,7 @@ class ServiceClient:
         decoder: None = None,
         data: Any | None = None,
         params: dict[str, str] | None = None,
+        coalesce: bool = False,
     ) -> None: ...
 
     async def _request[T](
@@ -134,11 +207,17 @@ class ServiceClient:
         decoder: msgspec.json.Decoder[T] | None = None,
         data: Any | None = None,
         params: dict[str, str] | None = None,
+        coalesce: bool = False,
     ) -> T | None:
+        url: URL = self.root_url / endpoint
+
         try:
+            if coalesce and decoder and method == hdrs.METH_GET and data is None:
+                return decoder.decode(await self._read_coalesced(url, params))
+
             async with self.session.request(
                 method=method,
-                url=self.root_url / endpoint,
+                url=url,
                 data=data and json_encoder.encode(data),
                 params=params,
             ) as response:
@@ -152,8 +231,134 @@ class ServiceClient:
             logger.exception('Failed request to the main service.')
             raise error
 
+    async def _read(self, url: URL, params: dict[str, str] | None = None) -> bytes:
+        async with self.session.get(url, params=params) as response:
+            return await response.read()
+
+    async def _read_coalesced(
+        self, url: URL, params: dict[str, str] | None = None
+    ) -> bytes:
+        key: tuple[str, str, tuple[tuple[str, str], ...]] = (
+            hdrs.METH_GET,
+            str(url),
+            tuple(sorted(params.items())) if params else (),
+        )
+        task: asyncio.Task[bytes] | None = self._inflight_requests.get(key)
+
+        if not task:
+            task = asyncio.create_task(self._read(url, params))
+            task.add_done_callback(lambda _: self._inflight_requests.pop(key, None))
+            self._inflight_requests[key] = task
+
+        # The shield keeps the shared request alive if one of the waiters is cancelled.
+        return await asyncio.shield(task)
+
+    async def _get_object[T: ServiceObject](
+        self,
+        type: ConnectionTargetObjectType,
+        id: int,
+        endpoint: str,
+        decoder: msgspec.json.Decoder[T],
+    ) -> T:
+        key: tuple[ConnectionTargetObjectType, int] = (type, id)
+        obj: ServiceObject | None = self._object_cache.get(key)
+
+        if obj is not None:
+            return cast(T, obj)
+
+        generation: int = self._cache_generation
+        new_obj: T = await self._request(
+            hdrs.METH_GET, endpoint, decoder=decoder, coalesce=True
+        )
+
+        # Don't cache an object that could have been invalidated while it was loading.
+        if generation == self._cache_generation:
+            self._object_cache.set(key, new_obj)
+
+        return new_obj
+
+    def _invalidate_chat_users(self, chat_ids: set[int], user_ids: set[int]) -> None:
+        if not chat_ids and not user_ids:
+            return
+
+        for chat_id, user_id in self._chat_user_cache:
+            if chat_id in chat_ids or user_id in user_ids:
+                self._chat_user_cache.pop((chat_id, user_id))
+
+    def _invalidate_subjects[T: Chat | User](
+        self, cache: TTLCache[int, tuple[Any, T]], ids: set[int]
+    ) -> None:
+        if not ids:
+            return
+
+        for telegram_id in cache:
+            item: tuple[Any, T] | None = cache.get(telegram_id)
+
+            if item and item[1].id in ids:
+                cache.pop(telegram_id)
+
+    def invalidate_cache(
+        self,
+        version: int | None = None,
+        objects: Iterable[tuple[ConnectionTargetObjectType | SubjectObjectType, int]]
+        | None = None,
+    ) -> bool:
+        if objects is None and version is not None and version == self.cache_version:
+            return False
+
+        if objects is not None and (version is None or version == self.cache_version):
+            is_flow_changed: bool = False
+            is_subjects_changed: bool = False
+            chat_ids: set[int] = set()
+            user_ids: set[int] = set()
+
+            for type, id in objects:
+                if type == SubjectObjectType.BOT:
+                    self._bot_cache.clear()
+                    is_subjects_changed = True
+                elif type == SubjectObjectType.CHAT:
+                    chat_ids.add(id)
+                    is_subjects_changed = True
+                elif type == SubjectObjectType.USER:
+                    user_ids.add(id)
+                    is_subjects_changed = True
+                elif isinstance(type, ConnectionTargetObjectType):
+                    self._object_cache.pop((type, id))
+                    is_flow_changed = True
+
+            self._invalidate_subjects(self._chat_cache, chat_ids)
+            self._invalidate_subjects(self._user_cache, user_ids)
+            self._invalidate_chat_users(chat_ids, user_ids)
+        else:
+            self._object_cache.clear()
+            self._bot_cache.clear()
+            self._chat_cache.clear()
+            self._user_cache.clear()
+            self._chat_user_cache.clear()
+            is_flow_changed = is_subjects_changed = True
+
+        if is_flow_changed:
+            self._cache_generation += 1
+        if is_subjects_changed:
+            self._subject_cache_generation += 1
+        if version is not None:
+            self.cache_version = version
+
+        return is_flow_changed
+
     async def get_bot(self) -> Bot:
-        return await self._request(hdrs.METH_GET, '', decoder=get_bot_decoder)
+        bot: Bot | None = self._bot_cache.get(self.bot_service_id)
+
+        if not bot:
+            generation: int = self._subject_cache_generation
+            bot = await self._request(
+                hdrs.METH_GET, '', decoder=get_bot_decoder, coalesce=True
+            )
+
+            if generation == self._subject_cache_generation:
+                self._bot_cache.set(self.bot_service_id, bot)
+
+        return bot
 
     async def assign_to_hub(self) -> None:
         await self._request(hdrs.METH_POST, 'hub/assign/')
@@ -195,12 +400,19 @@ class ServiceClient:
             params['has_target_connections'] = str(has_target_connections)
 
         return await self._request(
-            hdrs.METH_GET, 'triggers/', params=params, decoder=get_triggers_decoder
+            hdrs.METH_GET,
+            'triggers/',
+            params=params,
+            decoder=get_triggers_decoder,
+            coalesce=True,
         )
 
     async def get_trigger(self, id: int) -> Trigger:
-        return await self._request(
-            hdrs.METH_GET, f'triggers/{id}/', decoder=get_trigger_decoder
+        return await self._get_object(
+            ConnectionTargetObjectType.TRIGGER,
+            id,
+            f'triggers/{id}/',
+            decoder=get_trigger_decoder,
         )
 
     async def get_messages_keyboard_buttons(
@@ -218,6 +430,7 @@ class ServiceClient:
             'messages-keyboard-buttons/',
             params=params,
             decoder=get_messages_keyboard_buttons_decoder,
+            coalesce=True,
         )
 
     async def get_messages(self) -> list[Message]:
@@ -226,8 +439,11 @@ class ServiceClient:
         )
 
     async def get_message(self, id: int) -> Message:
-        return await self._request(
-            hdrs.METH_GET, f'messages/{id}/', decoder=get_message_decoder
+        return await self._get_object(
+            ConnectionTargetObjectType.MESSAGE,
+            id,
+            f'messages/{id}/',
+            decoder=get_message_decoder,
         )
 
     async def get_conditions(self) -> list[Condition]:
@@ -236,8 +452,11 @@ class ServiceClient:
         )
 
     async def get_condition(self, id: int) -> Condition:
-        return await self._request(
-            hdrs.METH_GET, f'conditions/{id}/', decoder=get_condition_decoder
+        return await self._get_object(
+            ConnectionTargetObjectType.CONDITION,
+            id,
+            f'conditions/{id}/',
+            decoder=get_condition_decoder,
         )
 
     async def get_background_tasks(
@@ -268,8 +487,11 @@ class ServiceClient:
         )
 
     async def get_api_request(self, id: int) -> APIRequest:
-        return await self._request(
-            hdrs.METH_GET, f'api-requests/{id}/', decoder=get_api_request_decoder
+        return await self._get_object(
+            ConnectionTargetObjectType.API_REQUEST,
+            id,
+            f'api-requests/{id}/',
+            decoder=get_api_request_decoder,
         )
 
     async def get_database_operations(self) -> list[DatabaseOperation]:
@@ -280,8 +502,9 @@ class ServiceClient:
         )
 
     async def get_database_operation(self, id: int) -> DatabaseOperation:
-        return await self._request(
-            hdrs.METH_GET,
+        return await self._get_object(
+            ConnectionTargetObjectType.DATABASE_OPERATION,
+            id,
             f'database-operations/{id}/',
             decoder=get_database_operation_decoder,
         )
@@ -292,8 +515,11 @@ class ServiceClient:
         )
 
     async def get_invoice(self, id: int) -> Invoice:
-        return await self._request(
-            hdrs.METH_GET, f'invoices/{id}/', decoder=get_invoice_decoder
+        return await self._get_object(
+            ConnectionTargetObjectType.INVOICE,
+            id,
+            f'invoices/{id}/',
+            decoder=get_invoice_decoder,
         )
 
     async def get_temporary_variables(self) -> list[TemporaryVariable]:
@@ -304,8 +530,9 @@ class ServiceClient:
         )
 
     async def get_temporary_variable(self, id: int) -> TemporaryVariable:
-        return await self._request(
-            hdrs.METH_GET,
+        return await self._get_object(
+            ConnectionTargetObjectType.TEMPORARY_VARIABLE,
+            id,
             f'temporary-variables/{id}/',
             decoder=get_temporary_variable_decoder,
         )
@@ -317,7 +544,7 @@ class ServiceClient:
             params['name'] = name
 
         return await self._request(
-            hdrs.METH_GET, 'variables/', decoder=get_variables_decoder
+            hdrs.METH_GET, 'variables/', decoder=get_variables_decoder, coalesce=True
         )
 
     async def get_variable(self, id: int) -> Variable:
@@ -374,12 +601,87 @@ class ServiceClient:
         )
 
     async def create_chat(self, data: CreateChat) -> Chat:
+        cached_item: tuple[CreateChat, Chat] | None = self._chat_cache.get(
+            data['telegram_id']
+        )
+
+        if cached_item and cached_item[0] == data:
+            return cached_item[1]
+
+        generation: int = self._subject_cache_generation
+        chat: Chat = (
+            await self._chat_batcher.submit(data)
+            if self._chat_batcher
+            else await self._create_chat(data)
+        )
+
+        # Don't cache a chat that could have been invalidated while it was created.
+        if generation == self._subject_cache_generation:
+            self._chat_cache.set(data['telegram_id'], (data, chat))
+
+        return chat
+
+    async def _create_chat(self, data: CreateChat) -> Chat:
         return await self._request(
             hdrs.METH_POST, 'chats/', data=data, decoder=create_chat_decoder
         )
 
+    async def create_chats(self, data: list[CreateChat]) -> list[Chat]:
+        return await self._request(
+            hdrs.METH_POST,
+            'chats/create-many/',
+            data=data,
+            decoder=create_chats_decoder,
+        )
+
     async def bind_users_to_chat(self, id: int, data: list[BindUserToChat]) -> None:
-        return await self._request(hdrs.METH_POST, f'chats/{id}/users/', data=data)
+        new_data: list[BindUserToChat] = [
+            item
+            for item in data
+            if 'id' not in item or not self._chat_user_cache.get((id, item['id']))
+        ]
+
+        if not new_data:
+            return
+
+        generation: int = self._subject_cache_generation
+
+        if self._chat_user_batcher:
+            await asyncio.gather(
+                *[self._chat_user_batcher.submit((id, item)) for item in new_data]
+            )
+        else:
+            await self._request(hdrs.METH_POST, f'chats/{id}/users/', data=new_data)
+
+        if generation != self._subject_cache_generation:
+            return
+
+        for item in new_data:
+            if 'id' in item:
+                self._chat_user_cache.set((id, item['id']), value=True)
+
+    async def _bind_user_to_chat(self, data: tuple[int, BindUserToChat]) -> None:
+        id, item = data
+        await self._request(hdrs.METH_POST, f'chats/{id}/users/', data=[item])
+
+    # The service has no bulk endpoint for bindings of several chats, so a batch is
+    # sent as one request per chat.
+    async def _bind_users_to_chats(
+        self, data: list[tuple[int, BindUserToChat]]
+    ) -> list[None]:
+        chat_data: dict[int, list[BindUserToChat]] = {}
+
+        for id, item in data:
+            chat_data.setdefault(id, []).append(item)
+
+        await asyncio.gather(
+            *[
+                self._request(hdrs.METH_POST, f'chats/{id}/users/', data=items)
+                for id, items in chat_data.items()
+            ]
+        )
+
+        return [None] * len(data)
 
     @overload
     async def get_users(
@@ -430,10 +732,38 @@ class ServiceClient:
         )
 
     async def create_user(self, data: CreateUser) -> User:
+        cached_item: tuple[CreateUser, User] | None = self._user_cache.get(
+            data['telegram_id']
+        )
+
+        if cached_item and cached_item[0] == data:
+            return cached_item[1]
+
+        generation: int = self._subject_cache_generation
+        user: User = (
+            await self._user_batcher.submit(data)
+            if self._user_batcher
+            else await self._create_user(data)
+        )
+
+        if generation == self._subject_cache_generation:
+            self._user_cache.set(data['telegram_id'], (data, user))
+
+        return user
+
+    async def _create_user(self, data: CreateUser) -> User:
         return await self._request(
             hdrs.METH_POST, 'users/', data=data, decoder=create_user_decoder
         )
 
+    async def create_users(self, data: list[CreateUser]) -> list[User]:
+        return await self._request(
+            hdrs.METH_POST,
+            'users/create-many/',
+            data=data,
+            decoder=create_users_decoder,
+        )
+
     async def get_database_records(
         self, search: str | None = None, has_data_path: str | None = None
     ) -> list[DatabaseRecord]:
@@ -449,6 +779,7 @@ class ServiceClient:
             'database-records/',
             params=params,
             decoder=get_database_records_decoder,
+            coalesce=True,
         )
 
     async def update_database_records(
@@ -23,6 +23,12 @@ class ConnectionTargetObjectType(StrEnum):
     TEMPORARY_VARIABLE = 'temporary_variable'
 
 
+class SubjectObjectType(StrEnum):
+    BOT = 'bot'
+    CHAT = 'chat'
+    USER = 'user'
+
+
 class APIRequestMethod(StrEnum):
     GET = 'get'
     POST = 'post'
@@ -139,6 +139,7 @@ class APIRequest(ServiceObject):
     headers: dict[str, Any] | None
     body: dict[str, Any] | list[Any] | None
     source_connections: list[Connection]
+    cache_ttl: int | None = None
 
 
 class DatabaseCreateOperation(ServiceObject):
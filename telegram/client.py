@@ -14,10 +14,16 @@ from aiolimiter import AsyncLimiter
 from yarl import URL
 import msgspec
 
+from core.enums import TelegramRateLimiterBackend
 from core.msgspec import json_encoder
+from core.settings import (
+    TELEGRAM_RATE_LIMITER_BACKEND,
+    TELEGRAM_RATE_LIMITER_LEASE_SIZE,
+)
 
 from .constants import PARSE_MODE
 from .enums import UpdateType
+from .limiter import ChatLimiter, RedisTokenBucket
 from .models import (
     BotCommand,
     InputMedia,
@@ -27,16 +33,18 @@ from .models import (
     TelegramResponse,
     User,
 )
+from .scheduler import OutboundScheduler
 from .types import KeyboardMarkup
 
 from http import HTTPStatus
 from typing import Any, Final
-import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+MAX_REQUEST_ATTEMPTS: Final[int] = 3
+
 HEADERS: Final[LooseHeaders] = {
     hdrs.USER_AGENT: 'ConstructorTelegramBots (constructor.exg1o.org)',
     hdrs.CONTENT_TYPE: 'application/json',
@@ -61,27 +69,23 @@ class TelegramClient:
 
     def __init__(self, bot_token: str) -> None:
         self.url = URL(f'https://api.telegram.org/bot{bot_token}')
-        self._global_limiter = AsyncLimiter(max_rate=30, time_period=1)
-        self._user_limiters: dict[int, AsyncLimiter] = {}
-        self._group_limiters: dict[int, AsyncLimiter] = {}
-
-    def _get_chat_limiter(self, chat_id: int) -> AsyncLimiter:
-        if chat_id > 0:
-            return self._user_limiters.setdefault(
-                chat_id, AsyncLimiter(max_rate=1, time_period=1)
+        self._global_limiter: AsyncLimiter | RedisTokenBucket = (
+            RedisTokenBucket(
+                key=f'tbh:{bot_token.split(":")[0]}:telegram:rate_limit',
+                max_rate=30,
+                time_period=1,
+                lease_size=TELEGRAM_RATE_LIMITER_LEASE_SIZE,
             )
-
-        return self._group_limiters.setdefault(
-            chat_id, AsyncLimiter(max_rate=20, time_period=60)
+            if TELEGRAM_RATE_LIMITER_BACKEND == TelegramRateLimiterBackend.REDIS
+            else AsyncLimiter(max_rate=30, time_period=1)
+        )
+        self._chat_limiter = ChatLimiter()
+        self._scheduler = OutboundScheduler(
+            global_limiter=self._global_limiter, chat_limiter=self._chat_limiter
         )
 
     async def _acquire_rate_limit(self, chat_id: int | None = None) -> None:
-        if chat_id is not None:
-            async with self._get_chat_limiter(chat_id), self._global_limiter:
-                return
-
-        async with self._global_limiter:
-            return
+        await self._scheduler.acquire(chat_id)
 
     @classmethod
     def get_session(cls) -> ClientSession:
@@ -100,43 +104,59 @@ class TelegramClient:
         data: dict[str, Any] | None = None,
     ) -> T:
         chat_id: int | None = data.get('chat_id') if data else None
-        await self._acquire_rate_limit(chat_id)
+        attempt: int = 0
 
         try:
-            async with self.session.post(
-                self.url / endpoint,
-                data=data and json_encoder.encode(prepare_request_data(data)),
-            ) as response:
-                body: bytes = await response.read()
-
-            response_status = HTTPStatus(response.status)
-            response_data: TelegramResponse[T] = decoder.decode(body)
-
-            if response_status.is_success and response_data.result:
-                return response_data.result
-
-            message: str | None = response_data.description
-
-            if not message:
-                message = f'{response_status.description} ({response_status})'
-
-            if parameters := response_data.parameters:
-                if parameters.migrate_to_chat_id:
-                    raise ChatMigratedError(message)  # noqa: TRY301
-                elif retry_after := parameters.retry_after:
-                    await asyncio.sleep(retry_after)
-                    return await self._request(endpoint, decoder, data)
-
-            if response_status in (HTTPStatus.NOT_FOUND, HTTPStatus.UNAUTHORIZED):
-                raise InvalidTokenError(message)  # noqa: TRY301
-            elif response_status == HTTPStatus.FORBIDDEN:
-                raise ForbiddenError(message)  # noqa: TRY301
-            elif response_status == HTTPStatus.BAD_REQUEST:
-                raise BadRequestError(message)  # noqa: TRY301
-            elif response_status == HTTPStatus.CONFLICT:
-                raise ConflictError(message)  # noqa: TRY301
-
-            raise NetworkError(message)  # noqa: TRY301
+            while True:
+                attempt += 1
+                await self._acquire_rate_limit(chat_id)
+
+                async with self.session.post(
+                    self.url / endpoint,
+                    data=data and json_encoder.encode(prepare_request_data(data)),
+                ) as response:
+                    body: bytes = await response.read()
+
+                response_status = HTTPStatus(response.status)
+                response_data: TelegramResponse[T] = decoder.decode(body)
+
+                if response_status.is_success and response_data.result:
+                    return response_data.result
+
+                message: str | None = response_data.description
+
+                if not message:
+                    message = f'{response_status.description} ({response_status})'
+
+                if parameters := response_data.parameters:
+                    if parameters.migrate_to_chat_id:
+                        raise ChatMigratedError(message)  # noqa: TRY301
+                    elif retry_after := parameters.retry_after:
+                        # Other requests of the chat or the whole bot wait too.
+                        self._scheduler.pause(retry_after, chat_id)
+                        logger.warning(
+                            'Telegram Bot API requests are throttled for %s s '
+                            '(throttled requests: %s, throttled time: %s s, '
+                            'throttled chat time: %s s).',
+                            retry_after,
+                            self._scheduler.throttled_requests,
+                            round(self._scheduler.throttled_time, 3),
+                            round(self._scheduler.chat_throttled_time, 3),
+                        )
+
+                        if attempt < MAX_REQUEST_ATTEMPTS:
+                            continue
+
+                if response_status in (HTTPStatus.NOT_FOUND, HTTPStatus.UNAUTHORIZED):
+                    raise InvalidTokenError(message)  # noqa: TRY301
+                elif response_status == HTTPStatus.FORBIDDEN:
+                    raise ForbiddenError(message)  # noqa: TRY301
+                elif response_status == HTTPStatus.BAD_REQUEST:
+                    raise BadRequestError(message)  # noqa: TRY301
+                elif response_status == HTTPStatus.CONFLICT:
+                    raise ConflictError(message)  # noqa: TRY301
+
+                raise NetworkError(message)  # noqa: TRY301
         except Exception as error:
             logger.exception('Failed request to the Telegram Bot API.')
             raise error
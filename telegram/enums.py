@@ -1,4 +1,4 @@
-from enum import StrEnum
+from enum import IntEnum, StrEnum
 
 
 class UpdateType(StrEnum):
@@ -25,3 +25,8 @@ class KeyboardButtonStyle(StrEnum):
     PRIMARY = 'primary'
     SUCCESS = 'success'
     DANGER = 'danger'
+
+
+class SendPriority(IntEnum):
+    INTERACTIVE = 0
+    BROADCAST = 1
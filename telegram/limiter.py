@@ -0,0 +1,215 @@
+from aiolimiter import AsyncLimiter
+from redis.exceptions import RedisError
+
+from core.redis import redis
+
+from array import array
+from collections.abc import Callable
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Refills the bucket for the elapsed time and takes up to the requested number of
+# tokens, returning how many were taken.
+take_tokens_script = redis.register_script(
+    """
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local requested = tonumber(ARGV[3])
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+    local taken = math.min(requested, math.floor(tokens))
+    redis.call('HSET', KEYS[1], 'tokens', tokens - taken, 'updated_at', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return taken
+    """
+)
+
+
+class ChatLimiterTable:
+    __slots__ = (
+        '_chat_ids',
+        '_indexes',
+        '_last_checks',
+        '_last_eviction',
+        '_levels',
+        '_rate_per_sec',
+        '_timer',
+        'max_rate',
+        'time_period',
+    )
+
+    def __init__(
+        self,
+        max_rate: float,
+        time_period: float,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._rate_per_sec: float = max_rate / time_period
+        self._timer = timer
+        self._last_eviction: float = timer()
+        # Leaky bucket of every chat is kept as a level and the time it was last
+        # updated, in parallel arrays indexed through one dict.
+        self._indexes: dict[int, int] = {}
+        self._chat_ids: array[int] = array('q')
+        self._levels: array[float] = array('d')
+        self._last_checks: array[float] = array('d')
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def _get_level(self, index: int, now: float) -> float:
+        elapsed: float = now - self._last_checks[index]
+        return max(self._levels[index] - elapsed * self._rate_per_sec, 0)
+
+    def has_capacity(self, chat_id: int) -> bool:
+        index: int | None = self._indexes.get(chat_id)
+
+        if index is None:
+            return True
+
+        return self._get_level(index, self._timer()) + 1 <= self.max_rate
+
+    def acquire(self, chat_id: int) -> None:
+        now: float = self._timer()
+        index: int | None = self._indexes.get(chat_id)
+
+        if index is None:
+            self._indexes[chat_id] = len(self._chat_ids)
+            self._chat_ids.append(chat_id)
+            self._levels.append(1)
+            self._last_checks.append(now)
+        else:
+            self._levels[index] = self._get_level(index, now) + 1
+            self._last_checks[index] = now
+
+        if now - self._last_eviction >= self.time_period:
+            self.evict_idle(now)
+
+    def _remove(self, index: int) -> None:
+        last_index: int = len(self._chat_ids) - 1
+        del self._indexes[self._chat_ids[index]]
+
+        if index != last_index:
+            moved_chat_id: int = self._chat_ids[last_index]
+            self._chat_ids[index] = moved_chat_id
+            self._levels[index] = self._levels[last_index]
+            self._last_checks[index] = self._last_checks[last_index]
+            self._indexes[moved_chat_id] = index
+
+        self._chat_ids.pop()
+        self._levels.pop()
+        self._last_checks.pop()
+
+    def evict_idle(self, now: float | None = None) -> None:
+        if now is None:
+            now = self._timer()
+
+        self._last_eviction = now
+
+        # Chats with a drained bucket are the same as chats never seen before.
+        for index in reversed(range(len(self._chat_ids))):
+            if self._get_level(index, now) == 0:
+                self._remove(index)
+
+
+class ChatLimiter:
+    def __init__(self) -> None:
+        self.user_limiters = ChatLimiterTable(max_rate=1, time_period=1)
+        self.group_limiters = ChatLimiterTable(max_rate=20, time_period=60)
+
+    def _get_table(self, chat_id: int) -> ChatLimiterTable:
+        return self.user_limiters if chat_id > 0 else self.group_limiters
+
+    def has_capacity(self, chat_id: int) -> bool:
+        return self._get_table(chat_id).has_capacity(chat_id)
+
+    def acquire(self, chat_id: int) -> None:
+        self._get_table(chat_id).acquire(chat_id)
+
+
+class RedisTokenBucket:
+    def __init__(
+        self,
+        key: str,
+        max_rate: float,
+        time_period: float,
+        lease_size: int,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.key = key
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self.lease_size = lease_size
+        self._timer = timer
+        # Tokens are taken from Redis in leases, which are only valid for one time
+        # period, so unused tokens don't pile up in idle processes.
+        self._tokens: int = 0
+        self._lease_expires_at: float = 0
+        self._next_lease_at: float = 0
+        self._lease_task: asyncio.Task[None] | None = None
+        # Used instead of Redis while it fails, so sending doesn't stop altogether.
+        self._fallback_limiter = AsyncLimiter(max_rate, time_period)
+        self._is_redis_failing: bool = False
+
+    def _get_tokens(self) -> int:
+        if self._lease_expires_at <= self._timer():
+            self._tokens = 0
+        return self._tokens
+
+    async def _lease(self) -> None:
+        try:
+            taken: int = await take_tokens_script(
+                keys=[self.key],
+                args=[self.max_rate / self.time_period, self.max_rate, self.lease_size],
+            )
+        except RedisError:
+            logger.exception('Failed to lease rate limit tokens from Redis.')
+            self._is_redis_failing = True
+            self._next_lease_at = self._timer() + self.time_period
+            return
+
+        self._is_redis_failing = False
+
+        if not taken:
+            self._next_lease_at = self._timer() + 1 / self.max_rate
+            return
+
+        self._tokens = self._get_tokens() + taken
+        self._lease_expires_at = self._timer() + self.time_period
+
+    def has_capacity(self) -> bool:
+        tokens: int = self._get_tokens()
+
+        # The next lease is prefetched before the current one runs out.
+        if (
+            tokens <= self.lease_size // 2
+            and self._next_lease_at <= self._timer()
+            and not (self._lease_task and not self._lease_task.done())
+        ):
+            self._lease_task = asyncio.create_task(self._lease())
+
+        if not tokens and self._is_redis_failing:
+            return self._fallback_limiter.has_capacity()
+
+        return tokens > 0
+
+    async def acquire(self) -> None:
+        if not self._get_tokens() and self._is_redis_failing:
+            await self._fallback_limiter.acquire()
+            return
+
+        # Tokens are refilled remotely, so there is nothing to wait on but time.
+        while not self.has_capacity():  # noqa: ASYNC110
+            await asyncio.sleep(1 / self.max_rate)
+
+        self._tokens -= 1
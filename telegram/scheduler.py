@@ -0,0 +1,154 @@
+from aiolimiter import AsyncLimiter
+
+from .enums import SendPriority
+from .limiter import ChatLimiter, RedisTokenBucket
+
+from collections import OrderedDict, deque
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from typing import Final
+import asyncio
+import time
+
+DISPATCH_INTERVAL: Final[float] = 0.05
+
+send_priority: ContextVar[SendPriority] = ContextVar(
+    'send_priority', default=SendPriority.INTERACTIVE
+)
+
+
+@contextmanager
+def use_send_priority(priority: SendPriority) -> Iterator[None]:
+    token = send_priority.set(priority)
+
+    try:
+        yield
+    finally:
+        send_priority.reset(token)
+
+
+class OutboundScheduler:
+    def __init__(
+        self,
+        global_limiter: AsyncLimiter | RedisTokenBucket,
+        chat_limiter: ChatLimiter,
+    ) -> None:
+        self._global_limiter = global_limiter
+        self._chat_limiter = chat_limiter
+        # Every priority class keeps its waiters per chat, chats are served in turns.
+        self._queues: list[OrderedDict[int | None, deque[asyncio.Future[None]]]] = [
+            OrderedDict() for _ in SendPriority
+        ]
+        self._wakeup = asyncio.Event()
+        self._dispatcher: asyncio.Task[None] | None = None
+        self._paused_until: float = 0
+        self._chat_paused_until: dict[int, float] = {}
+        self.throttled_requests: int = 0
+        # Pauses of single chats overlap with each other, so they are counted apart
+        # from the pauses of the whole bot.
+        self.throttled_time: float = 0
+        self.chat_throttled_time: float = 0
+
+    async def acquire(self, chat_id: int | None = None) -> None:
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._queues[send_priority.get()].setdefault(chat_id, deque()).append(future)
+        self._wakeup.set()
+
+        if not self._dispatcher or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        await future
+
+    def _is_chat_paused(self, chat_id: int, now: float) -> bool:
+        paused_until: float | None = self._chat_paused_until.get(chat_id)
+
+        if paused_until is None:
+            return False
+        elif paused_until <= now:
+            del self._chat_paused_until[chat_id]
+            return False
+
+        return True
+
+    def pause(self, retry_after: float, chat_id: int | None = None) -> None:
+        now: float = time.monotonic()
+        paused_until: float = now + retry_after
+        self.throttled_requests += 1
+
+        # Another chat is already throttled, so it's the limit of the whole bot.
+        if chat_id is not None and not any(
+            self._is_chat_paused(paused_chat_id, now)
+            for paused_chat_id in list(self._chat_paused_until)
+            if paused_chat_id != chat_id
+        ):
+            chat_paused_until: float = self._chat_paused_until.get(chat_id, now)
+
+            if paused_until > chat_paused_until:
+                self.chat_throttled_time += paused_until - max(chat_paused_until, now)
+                self._chat_paused_until[chat_id] = paused_until
+            return
+
+        if paused_until > self._paused_until:
+            self.throttled_time += paused_until - max(self._paused_until, now)
+            self._paused_until = paused_until
+
+    def _is_chat_ready(self, chat_id: int | None) -> bool:
+        return chat_id is None or (
+            not self._is_chat_paused(chat_id, time.monotonic())
+            and self._chat_limiter.has_capacity(chat_id)
+        )
+
+    def _pop_ready_waiter(
+        self,
+    ) -> tuple[int | None, asyncio.Future[None]] | None:
+        for queue in self._queues:
+            for _ in range(len(queue)):
+                if not queue:
+                    break
+
+                chat_id, waiters = next(iter(queue.items()))
+
+                while waiters and waiters[0].done():
+                    waiters.popleft()
+
+                if not waiters:
+                    del queue[chat_id]
+                    continue
+
+                queue.move_to_end(chat_id)
+
+                if self._is_chat_ready(chat_id):
+                    return chat_id, waiters.popleft()
+
+        return None
+
+    async def _dispatch(self) -> None:
+        while any(self._queues):
+            if (pause := self._paused_until - time.monotonic()) > 0:
+                await asyncio.sleep(pause)
+                continue
+
+            if not self._global_limiter.has_capacity():
+                await asyncio.sleep(1 / self._global_limiter.max_rate)
+                continue
+
+            self._wakeup.clear()
+            waiter: tuple[int | None, asyncio.Future[None]] | None = (
+                self._pop_ready_waiter()
+            )
+
+            if not waiter:
+                # Wait for a new waiter or for the per-chat limiters to refill.
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), DISPATCH_INTERVAL)
+                continue
+
+            chat_id, future = waiter
+
+            if chat_id is not None:
+                self._chat_limiter.acquire(chat_id)
+            await self._global_limiter.acquire()
+
+            if not future.done():
+                future.set_result(None)